@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for the hypergraph backends.
+
+Generates a synthetic hypergraph, drives every backend through the same
+HyperGraphBackend interface and prints JSON results, one object per
+backend, suitable for tracking regressions over time.
+
+    python bench/hypergraph_backends.py --vertices 10000 --edges 5000 \
+        --edge-size zipf:2.0 --output results.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from topos_mcp.hypergraph import BACKEND_NAMES, HyperEdge, make_backend
+
+def edge_size_sampler(spec: str, rng: random.Random) -> Callable[[], int]:
+    """Parse an edge-size distribution such as 'fixed:3', 'uniform:2,8',
+    'poisson:4' or 'zipf:2.0' into a sampler returning sizes >= 2"""
+    kind, _, arg = spec.partition(':')
+    if kind == 'fixed':
+        size = int(arg or 3)
+        return lambda: max(2, size)
+    if kind == 'uniform':
+        lo, hi = (int(x) for x in (arg or '2,8').split(','))
+        return lambda: rng.randint(max(2, lo), max(2, hi))
+    if kind == 'poisson':
+        mean = float(arg or 4)
+        def poisson() -> int:
+            # Knuth's method; fine for the small means used here
+            limit, k, p = pow(2.718281828459045, -mean), 0, 1.0
+            while p > limit:
+                k += 1
+                p *= rng.random()
+            return max(2, k - 1)
+        return poisson
+    if kind == 'zipf':
+        a = float(arg or 2.0)
+        return lambda: max(2, int(rng.paretovariate(a - 1)) + 1)
+    raise ValueError(f"Unknown edge-size distribution {spec!r}")
+
+def generate(n_vertices: int, n_edges: int, edge_size: str, seed: int
+             ) -> Tuple[List[Tuple[str, Dict[str, Any]]], List[HyperEdge]]:
+    """Synthetic vertices and hyperedges with a reproducible layout"""
+    rng = random.Random(seed)
+    sample = edge_size_sampler(edge_size, rng)
+    vertices = [(f"v{i}", {"type": "tile", "weight": i % 7}) for i in range(n_vertices)]
+    edges = []
+    for i in range(n_edges):
+        size = min(sample(), n_vertices)
+        members = {f"v{j}" for j in rng.sample(range(n_vertices), size)}
+        edges.append(HyperEdge(members, {"type": "region", "seq": i}, id=f"e{i}"))
+    return vertices, edges
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {"p50_us": pick(0.50) * 1e6, "p95_us": pick(0.95) * 1e6,
+            "p99_us": pick(0.99) * 1e6, "mean_us": sum(ordered) / len(ordered) * 1e6}
+
+def disk_bytes(path: Path) -> int:
+    """Size of a database file, or of everything under a database directory"""
+    if path.is_file():
+        return path.stat().st_size
+    return sum(p.stat().st_size for p in path.rglob('*') if p.is_file())
+
+def bench_backend(name: str, mode: str, vertices, edges, queries: List[str],
+                  workdir: Path) -> Dict[str, Any]:
+    """Load the graph into one fresh backend and time inserts and lookups"""
+    kuzu_path = workdir / f"{name}-{mode}.kuzu"
+    duckdb_path = workdir / f"{name}-{mode}.duckdb"
+    tracemalloc.start()
+    try:
+        backend = make_backend(name, str(kuzu_path), str(duckdb_path))
+
+        start = time.perf_counter()
+        if mode == 'bulk':
+            backend.add_vertices(vertices)
+        else:
+            for vertex_id, attrs in vertices:
+                backend.add_vertex(vertex_id, **attrs)
+        vertex_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if mode == 'bulk':
+            backend.add_edges(edges)
+        else:
+            for edge in edges:
+                backend.add_edge(edge)
+        edge_seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        # Stop tracing before timing lookups; tracemalloc slows every allocation
+        tracemalloc.stop()
+
+    latencies = []
+    for vertex_id in queries:
+        start = time.perf_counter()
+        backend.get_neighbors(vertex_id)
+        latencies.append(time.perf_counter() - start)
+
+    incidences = sum(len(edge.vertices) for edge in edges)
+    # Database files plus their WAL siblings
+    persisted = list(workdir.glob(f"{name}-{mode}.*"))
+    return {
+        "backend": name,
+        "mode": mode,
+        "vertex_inserts_per_s": len(vertices) / vertex_seconds if vertex_seconds else None,
+        "edge_inserts_per_s": len(edges) / edge_seconds if edge_seconds else None,
+        "incidences_per_s": incidences / edge_seconds if edge_seconds else None,
+        "neighbors": percentiles(latencies),
+        "python_peak_bytes": peak,
+        "disk_bytes": sum(disk_bytes(p) for p in persisted) if persisted else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vertices", type=int, default=2000)
+    parser.add_argument("--edges", type=int, default=1000)
+    parser.add_argument("--edge-size", default="poisson:4",
+                        help="fixed:N, uniform:LO,HI, poisson:MEAN or zipf:A")
+    parser.add_argument("--queries", type=int, default=500,
+                        help="number of get_neighbors lookups to time")
+    parser.add_argument("--backends", default=",".join(BACKEND_NAMES))
+    parser.add_argument("--modes", default="single,bulk",
+                        help="single (add_vertex/add_edge) and/or bulk (add_vertices/add_edges)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    vertices, edges = generate(args.vertices, args.edges, args.edge_size, args.seed)
+    rng = random.Random(args.seed + 1)
+    queries = [vertices[rng.randrange(len(vertices))][0] for _ in range(args.queries)]
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="hypergraph-bench-") as tmp:
+        for name in args.backends.split(','):
+            for mode in args.modes.split(','):
+                try:
+                    results.append(bench_backend(name, mode, vertices, edges,
+                                                 queries, Path(tmp)))
+                except Exception as e:
+                    results.append({"backend": name, "mode": mode, "error": repr(e)})
+                print(f"{name}/{mode} done", file=sys.stderr)
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "params": vars(args),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,237 @@
 #!/usr/bin/env python3
 import duckdb
+import hashlib
 import os
 import json
+import multiprocessing
+import pyarrow as pa
+import tempfile
+import threading
 from pathlib import Path
-from typing import Dict, Any, Optional
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Any, List, Optional, Set, Tuple, Union
 from datetime import datetime
 
+# Threads scanning workspace subtrees concurrently
+SNAPSHOT_WORKERS = min(16, (os.cpu_count() or 1) * 2)
+# Workspace directories under the home directory, in snapshot order
+WORKSPACES = ('infinity-topos', 'topos', 'sheaf', 'worlds')
+# Depth below a workspace root at which snapshot trees are truncated
+TREE_DEPTH = 10
+PATH_COLUMNS = ('path', 'workspace', 'parent', 'name', 'depth', 'is_dir', 'modified', 'error')
+LISTING_ENTRY = pa.struct([("name", pa.string()), ("is_dir", pa.bool_())])
+
+# Import bookkeeping shared with duck_ops. Imports skip conversations whose
+# content hash matches the one stored in import_conversations; each source's
+# import_watermarks row summarises its latest run.
+IMPORT_TABLES = """
+    CREATE TABLE IF NOT EXISTS import_watermarks (
+        source VARCHAR PRIMARY KEY,
+        content_hash VARCHAR,
+        conversations INTEGER,
+        imported_at TIMESTAMP
+    );
+    
+    CREATE TABLE IF NOT EXISTS import_conversations (
+        source VARCHAR,
+        conversation_id VARCHAR,
+        content_hash VARCHAR,
+        last_timestamp TIMESTAMP,
+        message_count INTEGER,
+        PRIMARY KEY (source, conversation_id)
+    );
+    
+    ALTER TABLE import_watermarks DROP COLUMN IF EXISTS last_conversation_id;
+    ALTER TABLE import_watermarks DROP COLUMN IF EXISTS last_timestamp;
+"""
+
+def content_hash(record: Dict[str, Any]) -> str:
+    """Stable hash of a conversation record, independent of key order"""
+    text = json.dumps(record, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+class _ScanPool:
+    """Thread pool whose tasks may wait on tasks they submit
+    
+    A task is only queued when a worker is free for it and otherwise runs
+    inline, so no more tasks are outstanding than there are workers and a
+    waiting task never blocks the worker its children need.
+    """
+    
+    def __init__(self, workers: int):
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self._slots = threading.BoundedSemaphore(workers)
+    
+    def submit(self, fn: Callable[..., Any], *args) -> Union[Future, Any]:
+        """A Future for fn(*args), or its result when every worker is busy"""
+        if not self._slots.acquire(blocking=False):
+            return fn(*args)
+        future = self.executor.submit(fn, *args)
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+    
+    def __enter__(self) -> "_ScanPool":
+        return self
+    
+    def __exit__(self, *exc):
+        self.executor.shutdown()
+
+def load_tree(con, node_hash: str, max_depth: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """Rebuild the tree stored under node_hash in tree_nodes
+    
+    Nodes deeper than max_depth are left without their children key.
+    """
+    rows = con.execute("""
+        WITH RECURSIVE reachable(hash, depth) AS (
+            SELECT $1, 0
+            UNION
+            SELECT unnest(n.children), r.depth + 1
+            FROM reachable r JOIN tree_nodes n USING (hash)
+            WHERE $2::INTEGER IS NULL OR r.depth < $2::INTEGER
+        )
+        SELECT hash, node, children FROM tree_nodes
+        WHERE hash IN (SELECT hash FROM reachable)
+    """, [node_hash, max_depth]).fetchall()
+    nodes = {h: (node, children) for h, node, children in rows}
+    
+    def build(h: str, depth: int) -> Dict[str, Any]:
+        fields, children = nodes[h]
+        node = json.loads(fields)
+        if children is not None and (max_depth is None or depth < max_depth):
+            node["children"] = [build(child, depth + 1) for child in children]
+        return node
+    
+    return build(node_hash, 0) if node_hash in nodes else None
+
+def workspace_tree(con, workspace: str, root_hash: Optional[str] = None,
+                   max_depth: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """One workspace's tree from a snapshot root, by default the latest snapshot's"""
+    row = con.execute("""
+        SELECT w.hash
+        FROM (
+            SELECT unnest(json_extract_string(r.node, '$.workspaces[*]')) AS workspace,
+                   unnest(r.children) AS hash
+            FROM tree_nodes r
+            WHERE r.hash = coalesce($1, (
+                SELECT root_hash FROM workspace_snapshots
+                WHERE root_hash IS NOT NULL ORDER BY timestamp DESC LIMIT 1))
+        ) w
+        WHERE w.workspace = $2
+    """, [root_hash, workspace]).fetchone()
+    return load_tree(con, row[0], max_depth) if row else None
+
+def tree_path_rows(tree: Dict[str, Any], workspace: str, depth: int = 0,
+                   rows: Optional[List[tuple]] = None) -> List[tuple]:
+    """Flatten a snapshot tree into workspace_paths rows (PATH_COLUMNS order)"""
+    rows = [] if rows is None else rows
+    path = tree["path"]
+    rows.append((path, workspace, os.path.dirname(path) if depth else None,
+                 os.path.basename(path), depth, tree.get("is_dir"),
+                 tree.get("modified"), tree.get("error")))
+    for child in tree.get("children", []):
+        tree_path_rows(child, workspace, depth + 1, rows)
+    return rows
+
+def paths_tree(con, workspace: str, max_depth: int = TREE_DEPTH) -> Optional[Dict[str, Any]]:
+    """Rebuild a workspace's snapshot tree from workspace_paths, down to max_depth
+    
+    Returns None when the workspace has no rows.
+    """
+    rows = con.execute("""
+        SELECT path, parent, name, depth, is_dir, modified, error FROM workspace_paths
+        WHERE workspace = ? AND depth <= ?
+        ORDER BY depth, name
+    """, [workspace, max_depth]).fetchall()
+    children: Dict[Optional[str], List[tuple]] = {}
+    for row in rows:
+        children.setdefault(row[1], []).append(row)
+    
+    def build(row: tuple) -> Dict[str, Any]:
+        path, _, name, depth, is_dir, modified, error = row
+        if depth >= TREE_DEPTH:
+            return {"truncated": True, "path": path}
+        if error is not None:
+            return {"exists": True, "path": path, "error": error}
+        if modified is None:
+            return {"exists": False, "path": path}
+        node = {"exists": True, "path": path, "is_dir": is_dir, "name": name,
+                "modified": modified}
+        if is_dir and depth < max_depth:
+            node["children"] = [build(child) for child in children.get(path, [])]
+        return node
+    
+    roots = children.get(None)
+    return build(roots[0]) if roots else None
+
+def workspace_children(con, workspace: str) -> List[Dict[str, Any]]:
+    """Immediate children of a workspace root, from the live path index when
+    it was updated after the latest snapshot, otherwise from that snapshot"""
+    live = con.execute("""
+        SELECT max(updated_at) >= coalesce((SELECT max(timestamp) FROM workspace_snapshots
+                                            WHERE root_hash IS NOT NULL), '-infinity')
+        FROM workspace_paths WHERE workspace = ?
+    """, [workspace]).fetchone()[0]
+    tree = (paths_tree(con, workspace, max_depth=1) if live
+            else workspace_tree(con, workspace, max_depth=1))
+    return tree.get("children", []) if tree else []
+
+def diff_trees(con, root_a: str, root_b: str) -> List[Tuple[str, str, Optional[bool]]]:
+    """Paths added, removed and modified between two stored trees
+    
+    Returns sorted (change, path, is_dir) tuples with change one of
+    'added', 'removed' or 'modified'. Directories are descended only where
+    their Merkle hashes differ; every node of an added or removed subtree is
+    listed, and directories are never reported as modified themselves.
+    """
+    changes: List[Tuple[str, str, Optional[bool]]] = []
+    pairs = [(root_a, root_b)] if root_a != root_b else []
+    added: List[str] = []
+    removed: List[str] = []
+    while pairs:
+        # Children of each differing pair of directories, matched by path
+        rows = con.execute("""
+            WITH pairs AS (
+                SELECT unnest($1::VARCHAR[]) AS a, unnest($2::VARCHAR[]) AS b
+            ),
+            kids AS (
+                SELECT p.a AS pair, 'a' AS side, unnest(n.children) AS hash
+                FROM pairs p JOIN tree_nodes n ON n.hash = p.a
+                UNION ALL
+                SELECT p.a, 'b', unnest(n.children)
+                FROM pairs p JOIN tree_nodes n ON n.hash = p.b
+            ),
+            nodes AS (
+                SELECT k.pair, k.side, k.hash, n.path, n.is_dir
+                FROM kids k JOIN tree_nodes n USING (hash)
+            ),
+            a AS (SELECT * FROM nodes WHERE side = 'a'),
+            b AS (SELECT * FROM nodes WHERE side = 'b')
+            SELECT a.hash, b.hash, b.path, a.is_dir, b.is_dir
+            FROM a FULL OUTER JOIN b ON a.pair = b.pair AND a.path = b.path
+            WHERE a.hash IS DISTINCT FROM b.hash
+        """, [[a for a, _ in pairs], [b for _, b in pairs]]).fetchall()
+        pairs = []
+        for hash_a, hash_b, path, dir_a, dir_b in rows:
+            if hash_a and hash_b and dir_a and dir_b:
+                pairs.append((hash_a, hash_b))
+            elif hash_a and hash_b and not dir_a and not dir_b:
+                changes.append(('modified', path, dir_b))
+            else:
+                removed += [hash_a] if hash_a else []
+                added += [hash_b] if hash_b else []
+    
+    for change, roots in (('added', added), ('removed', removed)):
+        if roots:
+            changes += [(change, path, is_dir) for path, is_dir in con.execute("""
+                WITH RECURSIVE subtree(hash) AS (
+                    SELECT unnest($1::VARCHAR[])
+                    UNION ALL
+                    SELECT unnest(n.children) FROM subtree s JOIN tree_nodes n USING (hash)
+                )
+                SELECT n.path, n.is_dir FROM subtree s JOIN tree_nodes n USING (hash)
+            """, [roots]).fetchall()]
+    return sorted(changes, key=lambda change: (change[1] or '', change[0]))
+
 class ToposDB:
     def __init__(self):
         self.db_dir = Path('../.bmorphism')
@@ -13,62 +239,170 @@ class ToposDB:
         
         # Initialize DuckDB connection
         self.duck_conn = duckdb.connect(str(self.db_dir / 'topos.duckdb'))
+        # Directory path -> (mtime_ns, entries) for _list_directory, loaded
+        # from directory_listings by the first snapshot
+        self._listings: Dict[str, Tuple[int, List[Tuple[str, bool]]]] = {}
+        self._listings_loaded = False
+        # Directories listed by the current snapshot, and those read from disk
+        self._listed: Set[str] = set()
+        self._relisted: Set[str] = set()
 
-    def _get_directory_tree(self, path: Path, max_depth: int = 10) -> Dict[str, Any]:
-        """Safely get directory tree structure without loading contents"""
-        if not path.exists():
-            return {"exists": False, "path": str(path)}
-            
-        if max_depth <= 0:
-            return {"truncated": True, "path": str(path)}
-            
+    def _list_directory(self, path: str, mtime_ns: int) -> List[Tuple[str, bool]]:
+        """Sorted (name, is_dir) of a directory's visible entries
+        
+        Listings are cached by directory mtime, so a directory whose entries
+        have not changed is not read again; snapshots persist the cache in
+        directory_listings. Only names are cached: a file edited in place
+        leaves its directory's mtime alone, so callers stat entries themselves.
+        """
+        self._listed.add(path)
+        cached = self._listings.get(path)
+        if cached and cached[0] == mtime_ns:
+            return cached[1]
+        entries = []
+        with os.scandir(path) as it:
+            for entry in it:
+                # Skip hidden files/directories
+                if entry.name.startswith('.'):
+                    continue
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                entries.append((entry.name, is_dir))
+        entries.sort()
+        self._listings[path] = (mtime_ns, entries)
+        self._relisted.add(path)
+        return entries
+    
+    def _load_listings(self):
+        """Fill the listing cache from directory_listings"""
+        table = self.duck_conn.execute(
+            "SELECT path, mtime_ns, entries FROM directory_listings").fetch_arrow_table()
+        for path, mtime_ns, entries in zip(*(table.column(c).to_pylist()
+                                             for c in ("path", "mtime_ns", "entries"))):
+            self._listings[path] = (mtime_ns, [(e["name"], e["is_dir"]) for e in entries])
+        self._listings_loaded = True
+    
+    def _save_listings(self, root: Optional[str] = None):
+        """Persist the listings read by the last scan and drop those of
+        directories it no longer reached, only beneath root if given"""
+        relisted = [path for path in self._relisted if path in self._listings]
+        con = self.duck_conn
+        con.register('_listings', pa.table({
+            "path": relisted,
+            "mtime_ns": [self._listings[path][0] for path in relisted],
+            "entries": [[dict(zip(LISTING_ENTRY.names, entry)) for entry in self._listings[path][1]]
+                        for path in relisted],
+        }, schema=pa.schema([("path", pa.string()), ("mtime_ns", pa.int64()),
+                             ("entries", pa.list_(LISTING_ENTRY))])))
+        con.register('_listed', pa.table({"path": list(self._listed)},
+                                         schema=pa.schema([("path", pa.string())])))
         try:
-            result = {
-                "exists": True,
-                "path": str(path),
-                "is_dir": path.is_dir(),
-                "name": path.name,
-                "modified": datetime.fromtimestamp(path.stat().st_mtime).isoformat()
-            }
-            
-            if path.is_dir():
-                result["children"] = []
-                for child in sorted(path.iterdir()):
-                    # Skip hidden files/directories
-                    if child.name.startswith('.'):
-                        continue
-                    result["children"].append(
-                        self._get_directory_tree(child, max_depth - 1)
-                    )
-                    
+            con.execute("INSERT OR REPLACE INTO directory_listings SELECT * FROM _listings")
+            con.execute("""
+                DELETE FROM directory_listings
+                WHERE path NOT IN (SELECT path FROM _listed)
+                  AND ($1::VARCHAR IS NULL OR path = $1 OR starts_with(path, $1 || '/'))
+            """, [root])
+        finally:
+            con.unregister('_listings')
+            con.unregister('_listed')
+            self._listed, self._relisted = set(), set()
+    
+    def _get_directory_tree(self, path: Path, max_depth: int = TREE_DEPTH,
+                            pool: Optional[_ScanPool] = None) -> Dict[str, Any]:
+        """Safely get directory tree structure without loading contents
+        
+        With a pool, the subtrees of child directories at every level are
+        scanned concurrently while workers are free.
+        """
+        path = str(path)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return {"exists": False, "path": path}
+        except OSError as e:
+            return {"exists": True, "path": path, "error": str(e)}
+        
+        if max_depth <= 0:
+            return {"truncated": True, "path": path}
+        
+        is_dir = os.path.isdir(path)
+        result = {
+            "exists": True,
+            "path": path,
+            "is_dir": is_dir,
+            "name": os.path.basename(path),
+            "modified": datetime.fromtimestamp(stat.st_mtime).isoformat()
+        }
+        if not is_dir:
             return result
-        except Exception as e:
-            return {
-                "exists": True,
-                "path": str(path),
-                "error": str(e)
-            }
+        try:
+            entries = self._list_directory(path, stat.st_mtime_ns)
+        except OSError as e:
+            return {"exists": True, "path": path, "error": str(e)}
+        
+        children = []
+        for name, child_is_dir in entries:
+            child = os.path.join(path, name)
+            if child_is_dir:
+                children.append(pool.submit(self._get_directory_tree, child, max_depth - 1, pool)
+                                if pool else self._get_directory_tree(child, max_depth - 1))
+                continue
+            try:
+                modified = datetime.fromtimestamp(os.stat(child).st_mtime).isoformat()
+            except OSError:
+                children.append({"exists": False, "path": child})
+                continue
+            if max_depth <= 1:
+                children.append({"truncated": True, "path": child})
+            else:
+                children.append({"exists": True, "path": child, "is_dir": False,
+                                 "name": name, "modified": modified})
+        result["children"] = [c.result() if isinstance(c, Future) else c for c in children]
+        return result
 
     def _snapshot_workspace_trees(self) -> Dict[str, Any]:
         """Take a snapshot of important workspace directories"""
         home = Path.home()
-        paths = [
-            home / "infinity-topos",
-            home / "topos",
-            home / "sheaf",
-            home / "worlds"
-        ]
+        paths = [home / name for name in WORKSPACES]
+        if not self._listings_loaded:
+            self._load_listings()
         
-        return {
-            "timestamp": datetime.now().isoformat(),
-            "trees": {
-                path.name: self._get_directory_tree(path)
-                for path in paths
+        with _ScanPool(SNAPSHOT_WORKERS) as pool:
+            snapshot = {
+                "timestamp": datetime.now().isoformat(),
+                "trees": {
+                    path.name: self._get_directory_tree(path, pool=pool)
+                    for path in paths
+                }
             }
-        }
+        self._save_listings()
+        return snapshot
+
+    def snapshot_workspaces(self) -> Dict[str, Any]:
+        """Scan every workspace into a snapshot, without storing it"""
+        return self._snapshot_workspace_trees()
+
+    def refresh_tree(self, path: str, max_depth: int = TREE_DEPTH) -> Dict[str, Any]:
+        """Rescan the tree under one path, as a snapshot would"""
+        if not self._listings_loaded:
+            self._load_listings()
+        tree = self._get_directory_tree(path, max_depth)
+        self._save_listings(root=path)
+        return tree
 
     def init_schema(self):
         """Initialize DuckDB schema"""
+        # Listings cached with per-file modified times predate stat-per-scan;
+        # the table is only a cache, so rebuild it
+        if self.duck_conn.execute("""
+            SELECT count(*) FROM duckdb_columns()
+            WHERE table_name = 'directory_listings' AND column_name = 'entries'
+              AND data_type LIKE '%modified%'
+        """).fetchone()[0]:
+            self.duck_conn.execute("DROP TABLE directory_listings")
         self.duck_conn.execute("""
             CREATE TABLE IF NOT EXISTS conversations (
                 id VARCHAR PRIMARY KEY,
@@ -94,187 +428,337 @@ class ToposDB:
                 sheaf_tree JSON,
                 worlds_tree JSON
             );
-        """)
-
-    def import_claude_history(self, history_dir: str):
-        """Import Claude Desktop history with workspace snapshots"""
-        try:
-            # Clear existing data
-            self.duck_conn.execute("DELETE FROM messages")
-            self.duck_conn.execute("DELETE FROM conversations")
-            self.duck_conn.execute("DELETE FROM workspace_snapshots")
             
-            # Create a test conversation
-            conv_id = "test_conversation"
-            timestamp = datetime.now().isoformat()
+            -- Content-addressed workspace trees: one row per distinct node,
+            -- keyed by a Merkle hash of its fields and its children's hashes.
+            -- A snapshot's root node lists the workspaces it covers.
+            CREATE TABLE IF NOT EXISTS tree_nodes (
+                hash VARCHAR PRIMARY KEY,
+                path VARCHAR,
+                is_dir BOOLEAN,
+                node JSON,
+                children VARCHAR[]
+            );
             
-            # Take workspace snapshot
-            snapshot = self._snapshot_workspace_trees()
+            -- Directory listings cached by mtime across snapshots
+            CREATE TABLE IF NOT EXISTS directory_listings (
+                path VARCHAR PRIMARY KEY,
+                mtime_ns BIGINT,
+                entries STRUCT(name VARCHAR, is_dir BOOLEAN)[]
+            );
             
-            # Store snapshot
-            snapshot_id = f"snapshot_{conv_id}"
-            self.duck_conn.execute("""
-                INSERT INTO workspace_snapshots (
-                    id, timestamp, 
-                    infinity_topos_tree, topos_tree, 
-                    sheaf_tree, worlds_tree
-                ) VALUES (?, ?, ?::JSON, ?::JSON, ?::JSON, ?::JSON)
-            """, [
-                snapshot_id, 
-                timestamp,
-                json.dumps(snapshot["trees"].get("infinity-topos")),
-                json.dumps(snapshot["trees"].get("topos")),
-                json.dumps(snapshot["trees"].get("sheaf")),
-                json.dumps(snapshot["trees"].get("worlds"))
-            ])
+            -- Live index of workspace paths maintained by workspace_watch;
+            -- depth counts from the workspace root, modified is NULL for
+            -- entries that vanished or are broken links
+            CREATE TABLE IF NOT EXISTS workspace_paths (
+                path VARCHAR PRIMARY KEY,
+                workspace VARCHAR,
+                parent VARCHAR,
+                name VARCHAR,
+                depth INTEGER,
+                is_dir BOOLEAN,
+                modified VARCHAR,
+                error VARCHAR,
+                updated_at TIMESTAMP
+            );
             
-            # Store conversation
+            ALTER TABLE workspace_snapshots ADD COLUMN IF NOT EXISTS root_hash VARCHAR;
+            ALTER TABLE conversations ADD COLUMN IF NOT EXISTS snapshot_hash VARCHAR;
+        """)
+        self.duck_conn.execute(IMPORT_TABLES)
+        self._migrate_snapshots()
+
+    def _migrate_snapshots(self):
+        """Move snapshots stored as JSON trees into tree_nodes"""
+        roots: Dict[str, str] = {}
+        
+        def root_of(trees: Dict[str, Any]) -> str:
+            # Conversations of one import run share the same snapshot text
+            text = json.dumps(trees, sort_keys=True)
+            if text not in roots:
+                roots[text] = self._store_tree_nodes(trees)
+            return roots[text]
+        
+        legacy = self.duck_conn.execute("""
+            SELECT id, infinity_topos_tree, topos_tree, sheaf_tree, worlds_tree
+            FROM workspace_snapshots WHERE root_hash IS NULL
+        """).fetchall()
+        for snapshot_id, *trees in legacy:
+            root_hash = root_of({name: json.loads(tree) if tree else None
+                                 for name, tree in zip(WORKSPACES, trees)})
             self.duck_conn.execute("""
-                INSERT INTO conversations (id, timestamp, source, workspace_snapshot)
-                VALUES (?, ?, ?, ?::JSON)
-            """, [
-                conv_id,
-                timestamp,
-                'claude_desktop',
-                json.dumps(snapshot)
-            ])
-
-            # Add a test message
+                UPDATE workspace_snapshots
+                SET root_hash = ?, infinity_topos_tree = NULL, topos_tree = NULL,
+                    sheaf_tree = NULL, worlds_tree = NULL
+                WHERE id = ?
+            """, [root_hash, snapshot_id])
+        
+        legacy = self.duck_conn.execute("""
+            SELECT id, workspace_snapshot FROM conversations
+            WHERE snapshot_hash IS NULL AND workspace_snapshot IS NOT NULL
+        """).fetchall()
+        for conversation_id, snapshot in legacy:
+            root_hash = root_of(json.loads(snapshot).get("trees", {}))
             self.duck_conn.execute("""
-                INSERT INTO messages (
-                    id, conversation_id, timestamp, 
-                    role, content, ordering
-                ) VALUES (?, ?, ?, ?, ?, ?)
-            """, [
-                'msg_test_1',
-                conv_id,
-                timestamp,
-                'assistant',
-                'Test message',
-                1
-            ])
-
-            print("Successfully created test data")
-            self.analyze()
-            return True
-        except Exception as e:
-            print(f"Error importing Claude history: {e}")
-            print(f"Error details: {str(e)}")
-            return False
+                UPDATE conversations SET snapshot_hash = ?, workspace_snapshot = NULL
+                WHERE id = ?
+            """, [root_hash, conversation_id])
+
+    @staticmethod
+    def _tree_rows(node: Dict[str, Any], rows: Dict[str, tuple]) -> str:
+        """Collect tree_nodes rows for node and its descendants; returns node's hash"""
+        children = node.get("children")
+        child_hashes = None if children is None else [
+            ToposDB._tree_rows(child, rows) for child in children]
+        fields = {key: value for key, value in node.items() if key != "children"}
+        node_hash = hashlib.sha256(json.dumps([fields, child_hashes], sort_keys=True,
+                                              separators=(",", ":")).encode()).hexdigest()
+        rows[node_hash] = (node_hash, fields.get("path"), fields.get("is_dir"),
+                           json.dumps(fields), child_hashes)
+        return node_hash
 
-    def import_cline_history(self, history_file: str):
-        """Import Cline history with workspace snapshots"""
+    def _store_tree_nodes(self, trees: Dict[str, Any]) -> str:
+        """Store workspace trees under a snapshot root node; returns the root hash
+        
+        Nodes already stored, such as unchanged subtrees of earlier
+        snapshots, are not written again.
+        """
+        trees = {name: tree for name, tree in trees.items() if tree is not None}
+        rows: Dict[str, tuple] = {}
+        root_hash = self._tree_rows({"workspaces": list(trees),
+                                     "children": list(trees.values())}, rows)
+        self.duck_conn.register('_nodes', pa.table({
+            column: [row[i] for row in rows.values()]
+            for i, column in enumerate(("hash", "path", "is_dir", "node", "children"))
+        }, schema=pa.schema([("hash", pa.string()), ("path", pa.string()),
+                             ("is_dir", pa.bool_()), ("node", pa.string()),
+                             ("children", pa.list_(pa.string()))])))
         try:
-            with open(history_file) as f:
-                data = json.load(f)
+            self.duck_conn.execute("""
+                INSERT OR IGNORE INTO tree_nodes
+                SELECT hash, path, is_dir, node::JSON, children FROM _nodes
+            """)
+        finally:
+            self.duck_conn.unregister('_nodes')
+        return root_hash
 
-            # Process messages
-            for session in data:
-                session_id = session['id']
+    def _store_snapshot(self, snapshot_id: str, timestamp: str, snapshot: Dict[str, Any]) -> str:
+        """Store a workspace snapshot and return its root hash"""
+        root_hash = self._store_tree_nodes(snapshot["trees"])
+        self.duck_conn.execute("""
+            INSERT OR REPLACE INTO workspace_snapshots (id, timestamp, root_hash)
+            VALUES (?, ?, ?)
+        """, [snapshot_id, timestamp, root_hash])
+        return root_hash
+
+    def store_snapshot(self, snapshot: Dict[str, Any]) -> str:
+        """Store a snapshot as taken by snapshot_workspaces; returns its root hash"""
+        timestamp = snapshot["timestamp"]
+        return self._store_snapshot(f"snapshot_{timestamp}", timestamp, snapshot)
+
+    def _merge_staged(self, source: str, stage: str, summary: Dict[str, Any],
+                      snapshot_hash: Optional[str] = None) -> Tuple[Dict[str, int], Optional[str]]:
+        """Merge staged sessions of one file in a single transaction
+        
+        stage is the prefix of the stage_sessions and stage_messages
+        relations ('' for registered Arrow tables, 'stage.' for an attached
+        staging database). Sessions whose content hash matches the one
+        stored in import_conversations are skipped; changed ones have their
+        messages replaced. A workspace snapshot is taken the first time a
+        file has changes, unless snapshot_hash already names this run's;
+        the workspace walk runs before the transaction opens and only its
+        rows are written inside it. Import bookkeeping is keyed
+        'conversations:<source>' so it stays separate from duck_ops imports
+        into the same database. Returns the counts and the snapshot hash.
+        """
+        key = f"conversations:{source}"
+        con = self.duck_conn
+        con.execute(f"""
+            CREATE OR REPLACE TEMP TABLE _changed AS
+            SELECT s.* FROM {stage}stage_sessions s
+            LEFT JOIN import_conversations k
+              ON k.source = ? AND k.conversation_id = s.session_id
+            WHERE k.content_hash IS DISTINCT FROM s.content_hash
+        """, [key])
+        imported, messages = con.execute(
+            "SELECT count(*), coalesce(sum(message_count), 0) FROM _changed").fetchone()
+        snapshot = None
+        if imported and snapshot_hash is None:
+            snapshot = self._snapshot_workspace_trees()
+        con.begin()
+        try:
+            if imported:
                 timestamp = datetime.now().isoformat()
-                
-                # Take workspace snapshot
-                snapshot = self._snapshot_workspace_trees()
-                
-                # Store snapshot
-                snapshot_id = f"snapshot_{session_id}"
-                self.duck_conn.execute("""
-                    INSERT INTO workspace_snapshots (
-                        id, timestamp, 
-                        infinity_topos_tree, topos_tree, 
-                        sheaf_tree, worlds_tree
-                    ) VALUES (?, ?, ?::JSON, ?::JSON, ?::JSON, ?::JSON)
-                """, [
-                    snapshot_id, 
-                    timestamp,
-                    json.dumps(snapshot["trees"].get("infinity-topos")),
-                    json.dumps(snapshot["trees"].get("topos")),
-                    json.dumps(snapshot["trees"].get("sheaf")),
-                    json.dumps(snapshot["trees"].get("worlds"))
-                ])
-                
-                # Store conversation
-                self.duck_conn.execute("""
-                    INSERT INTO conversations (id, timestamp, source, workspace_snapshot)
-                    VALUES (?, ?, ?, ?::JSON)
-                """, [
-                    session_id,
-                    timestamp,
-                    'cline',
-                    json.dumps(snapshot)
-                ])
-
-                # Process messages
-                for i, msg in enumerate(session['messages']):
-                    msg_id = f'cline_msg_{session_id}_{i+1}'
-                    
-                    self.duck_conn.execute("""
-                        INSERT INTO messages (
-                            id, conversation_id, timestamp, 
-                            role, content, ordering
-                        ) VALUES (?, ?, ?, ?, ?, ?)
-                    """, [
-                        msg_id,
-                        session_id,
-                        msg['timestamp'],
-                        msg['role'],
-                        msg['content'],
-                        i+1
-                    ])
+                if snapshot is not None:
+                    snapshot_hash = self._store_snapshot(f"snapshot_{snapshot['timestamp']}",
+                                                         timestamp, snapshot)
+                # Conversations are updated in place: DuckDB cannot delete a row
+                # still referenced by messages within the same transaction
+                con.execute("""
+                    DELETE FROM messages WHERE conversation_id IN (SELECT session_id FROM _changed)
+                """)
+                con.execute("""
+                    UPDATE conversations SET timestamp = ?, snapshot_hash = ?
+                    WHERE id IN (SELECT session_id FROM _changed)
+                """, [timestamp, snapshot_hash])
+                con.execute("""
+                    INSERT INTO conversations (id, timestamp, source, snapshot_hash)
+                    SELECT session_id, ?, ?, ? FROM _changed
+                    WHERE session_id NOT IN (SELECT id FROM conversations)
+                """, [timestamp, source, snapshot_hash])
+                con.execute(f"""
+                    INSERT INTO messages (id, conversation_id, timestamp, role, content, ordering)
+                    SELECT m.id, m.conversation_id,
+                           coalesce(m.timestamp::TIMESTAMP, ?::TIMESTAMP),
+                           m.role, m.content, m.ordering
+                    FROM {stage}stage_messages m
+                    SEMI JOIN _changed c ON c.session_id = m.conversation_id
+                """, [timestamp])
+                con.execute("""
+                    INSERT OR REPLACE INTO import_conversations
+                    SELECT ?, session_id, content_hash,
+                           TRY_CAST(last_timestamp AS TIMESTAMP), message_count
+                    FROM _changed
+                """, [key])
+            con.execute("""
+                INSERT OR REPLACE INTO import_watermarks
+                    (source, content_hash, conversations, imported_at)
+                VALUES (?, ?, ?, now())
+            """, [key, summary["content_hash"], summary["sessions"]])
+        except BaseException:
+            con.rollback()
+            raise
+        finally:
+            con.execute("DROP TABLE IF EXISTS _changed")
+        con.commit()
+        return {"imported": imported, "unchanged": summary["sessions"] - imported,
+                "messages": int(messages)}, snapshot_hash
+
+    def _import_conversations(self, source: str, sessions: List[Dict[str, Any]],
+                              message_prefix: str,
+                              snapshot_hash: Optional[str] = None) -> Tuple[Dict[str, int], Optional[str]]:
+        """Validate, stage and merge one batch of sessions; see _merge_staged"""
+        validate_sessions(sessions)
+        tables, summary = stage_sessions(sessions, message_prefix)
+        for name, table in tables.items():
+            self.duck_conn.register(f"stage_{name}", table)
+        try:
+            check_staged(self.duck_conn)
+            return self._merge_staged(source, '', summary, snapshot_hash)
+        finally:
+            for name in tables:
+                self.duck_conn.unregister(f"stage_{name}")
 
+    def import_claude_history(self, history_dir: str):
+        """Import Claude Desktop history with workspace snapshots"""
+        try:
+            # Create a test conversation
+            conversation = {
+                "id": "test_conversation",
+                "messages": [{"role": "assistant", "content": "Test message"}]
+            }
+            counts, _ = self._import_conversations('claude_desktop', [conversation], 'msg_')
+            print(f"Imported {counts['imported']} new or changed conversations "
+                  f"({counts['unchanged']} unchanged)")
+            self.analyze()
             return True
         except Exception as e:
-            print(f"Error importing Cline history: {e}")
+            print(f"Error importing Claude history: {e}")
+            print(f"Error details: {str(e)}")
             return False
 
+    def import_cline_history(self, *history_files: str, workers: int = 1):
+        """Import new and changed Cline sessions with workspace snapshots
+        
+        Each file is merged in its own transaction, so a file that fails
+        validation or merging leaves no partial data. With workers > 1,
+        files are parsed, validated and staged into per-file DuckDB
+        databases by a pool of processes, then merged here in order. One
+        workspace snapshot is taken for the whole run.
+        """
+        snapshot_hash = None
+        ok = True
+        
+        def report(history_file: str, counts: Dict[str, int]):
+            print(f"{history_file}: imported {counts['imported']} new or changed sessions "
+                  f"({counts['unchanged']} unchanged), {counts['messages']} messages")
+        
+        if workers <= 1 or len(history_files) <= 1:
+            for history_file in history_files:
+                try:
+                    with open(history_file) as f:
+                        data = json.load(f)
+                    counts, snapshot_hash = self._import_conversations(
+                        'cline', data, 'cline_msg_', snapshot_hash)
+                    report(history_file, counts)
+                except Exception as e:
+                    print(f"Error importing Cline history {history_file}: {e}")
+                    ok = False
+            return ok
+        
+        with tempfile.TemporaryDirectory(prefix="cline-stage-") as tmp, \
+                ProcessPoolExecutor(max_workers=workers,
+                                    mp_context=multiprocessing.get_context('spawn')) as pool:
+            stages = [str(Path(tmp) / f"stage_{i}.duckdb") for i in range(len(history_files))]
+            futures = [pool.submit(stage_history_file, history_file, 'cline_msg_', stage)
+                       for history_file, stage in zip(history_files, stages)]
+            for history_file, stage, future in zip(history_files, stages, futures):
+                try:
+                    summary = future.result()
+                    # ATTACH takes no parameters; stage is a path we created
+                    self.duck_conn.execute(
+                        "ATTACH '%s' AS stage (READ_ONLY)" % stage.replace("'", "''"))
+                    try:
+                        counts, snapshot_hash = self._merge_staged(
+                            'cline', 'stage.', summary, snapshot_hash)
+                    finally:
+                        self.duck_conn.execute("DETACH stage")
+                    report(history_file, counts)
+                except Exception as e:
+                    print(f"Error importing Cline history {history_file}: {e}")
+                    ok = False
+        return ok
+
     def analyze(self):
         """Analyze workspace snapshots and conversations"""
         print("\n📊 Database Analysis")
         
         print("\nWorkspace Existence:")
         print(self.duck_conn.sql("""
-            WITH workspace_existence AS (
-                SELECT 
-                    COUNT(*) as total_snapshots,
-                    SUM(CASE WHEN infinity_topos_tree::json->>'exists' = 'true' THEN 1 ELSE 0 END) as infinity_topos_exists,
-                    SUM(CASE WHEN topos_tree::json->>'exists' = 'true' THEN 1 ELSE 0 END) as topos_exists,
-                    SUM(CASE WHEN sheaf_tree::json->>'exists' = 'true' THEN 1 ELSE 0 END) as sheaf_exists,
-                    SUM(CASE WHEN worlds_tree::json->>'exists' = 'true' THEN 1 ELSE 0 END) as worlds_exists
-                FROM workspace_snapshots
+            WITH workspaces AS (
+                SELECT unnest(json_extract_string(r.node, '$.workspaces[*]')) AS workspace,
+                       unnest(r.children) AS hash
+                FROM workspace_snapshots s
+                JOIN tree_nodes r ON r.hash = s.root_hash
             )
             SELECT 
-                total_snapshots,
-                infinity_topos_exists,
-                topos_exists,
-                sheaf_exists,
-                worlds_exists,
-                ROUND(100.0 * infinity_topos_exists / total_snapshots, 2) as infinity_topos_pct,
-                ROUND(100.0 * topos_exists / total_snapshots, 2) as topos_pct,
-                ROUND(100.0 * sheaf_exists / total_snapshots, 2) as sheaf_pct,
-                ROUND(100.0 * worlds_exists / total_snapshots, 2) as worlds_pct
-            FROM workspace_existence
+                w.workspace,
+                COUNT(*) as total_snapshots,
+                SUM(CASE WHEN n.node->>'exists' = 'true' THEN 1 ELSE 0 END) as exists,
+                ROUND(100.0 * exists / total_snapshots, 2) as exists_pct
+            FROM workspaces w
+            JOIN tree_nodes n ON n.hash = w.hash
+            GROUP BY w.workspace
+            ORDER BY w.workspace
         """).df())
         
         print("\nWorkspace Details:")
-        for workspace in ['infinity_topos', 'topos', 'sheaf', 'worlds']:
+        for workspace in WORKSPACES:
             print(f"\n{workspace.upper()} Directory Structure:")
-            result = self.duck_conn.sql(f"""
-                SELECT 
-                    {workspace}_tree::json->>'path' as path,
-                    {workspace}_tree::json->>'exists' as exists,
-                    {workspace}_tree::json->>'modified' as modified,
-                    {workspace}_tree::json->>'children' as children
-                FROM workspace_snapshots
-                ORDER BY timestamp DESC
-                LIMIT 1
-            """).df()
-            print(result)
+            tree = workspace_tree(self.duck_conn, workspace, max_depth=1)
+            if tree is None:
+                print("No snapshot")
+                continue
+            print(f"path: {tree.get('path')}  exists: {tree.get('exists')}  "
+                  f"modified: {tree.get('modified')}")
             
-            if result['exists'][0] == 'true':
+            if tree.get('exists'):
                 print("\nContents:")
-                children = json.loads(result['children'][0]) if result['children'][0] else []
-                for child in children:
-                    print(f"- {child['name']} ({'dir' if child['is_dir'] else 'file'}) - Modified: {child['modified']}")
+                for child in tree.get('children', []):
+                    kind = ('missing' if child.get('exists') is False
+                            else 'dir' if child.get('is_dir') else 'file')
+                    print(f"- {child.get('name', child['path'])} ({kind}) - "
+                          f"Modified: {child.get('modified')}")
         
         print("\nConversation Statistics:")
         print(self.duck_conn.sql("""
@@ -289,10 +773,156 @@ class ToposDB:
             JOIN messages m ON c.id = m.conversation_id
         """).df())
 
+    def resolve_snapshot(self, ref: str) -> Tuple[str, str]:
+        """(root hash, label) of a snapshot given its id, a conversation id,
+        a root hash or unique hash prefix, or 'latest'"""
+        rows = self.duck_conn.execute("""
+            SELECT root_hash, id || ' (' || timestamp || ')' FROM workspace_snapshots
+            WHERE root_hash IS NOT NULL
+              AND (id = $1 OR root_hash = $1 OR (length($1) >= 7 AND starts_with(root_hash, $1)))
+            UNION
+            SELECT snapshot_hash, 'conversation ' || id FROM conversations
+            WHERE id = $1 AND snapshot_hash IS NOT NULL
+            UNION
+            (SELECT root_hash, id || ' (' || timestamp || ')' FROM workspace_snapshots
+             WHERE $1 = 'latest' AND root_hash IS NOT NULL
+             ORDER BY timestamp DESC LIMIT 1)
+        """, [ref]).fetchall()
+        if len({row[0] for row in rows}) != 1:
+            raise ValueError(f"{'Ambiguous' if rows else 'Unknown'} snapshot {ref!r}")
+        return rows[0]
+
+    def diff(self, ref_a: str, ref_b: str) -> List[Tuple[str, str, Optional[bool]]]:
+        """Paths changed between two snapshots; see resolve_snapshot for refs"""
+        return diff_trees(self.duck_conn, self.resolve_snapshot(ref_a)[0],
+                          self.resolve_snapshot(ref_b)[0])
+
+    def changes(self, since: str) -> Tuple[str, List[Tuple[str, str, Optional[bool]]]]:
+        """Paths changed between the last snapshot taken at or before since
+        (the first snapshot, if none was) and the latest one
+        
+        Returns the base snapshot's label with the changes.
+        """
+        row = self.duck_conn.execute("""
+            SELECT root_hash, id || ' (' || timestamp || ')' FROM workspace_snapshots
+            WHERE root_hash IS NOT NULL
+            ORDER BY timestamp <= ?::TIMESTAMP DESC,
+                     CASE WHEN timestamp <= ?::TIMESTAMP THEN timestamp END DESC,
+                     timestamp
+            LIMIT 1
+        """, [since, since]).fetchone()
+        if row is None:
+            raise ValueError("No workspace snapshots")
+        return row[1], diff_trees(self.duck_conn, row[0], self.resolve_snapshot('latest')[0])
+
     def close(self):
         """Close database connection"""
         self.duck_conn.close()
 
+# Staged rows of one history file, as written by stage_sessions
+STAGE_SCHEMAS = {
+    "sessions": pa.schema([("session_id", pa.string()), ("content_hash", pa.string()),
+                           ("last_timestamp", pa.string()), ("message_count", pa.int32())]),
+    "messages": pa.schema([("id", pa.string()), ("conversation_id", pa.string()),
+                           ("timestamp", pa.string()), ("role", pa.string()),
+                           ("content", pa.string()), ("ordering", pa.int32())]),
+}
+
+def validate_sessions(sessions: Any):
+    """Raise ValueError listing the malformed sessions and messages, if any"""
+    problems = []
+    if not isinstance(sessions, list):
+        raise ValueError("Expected a JSON array of sessions")
+    for i, session in enumerate(sessions):
+        if not isinstance(session, dict) or session.get('id') is None:
+            problems.append(f"session {i}: missing id")
+            continue
+        if not isinstance(session.get('messages'), list):
+            problems.append(f"session {session['id']}: messages is not a list")
+            continue
+        for j, msg in enumerate(session['messages']):
+            if not isinstance(msg, dict) or not isinstance(msg.get('role'), str) \
+                    or 'content' not in msg:
+                problems.append(f"session {session['id']} message {j + 1}: "
+                                "needs a string role and content")
+    if problems:
+        raise ValueError(f"{len(problems)} invalid records: " + "; ".join(problems[:5])
+                         + ("; ..." if len(problems) > 5 else ""))
+
+def stage_sessions(sessions: List[Dict[str, Any]], message_prefix: str
+                   ) -> Tuple[Dict[str, pa.Table], Dict[str, Any]]:
+    """Arrow tables of the session and message rows of validated sessions
+    
+    The first occurrence of a session id wins. Also returns the file's
+    import summary: a digest of every session's content hash and the
+    number of sessions.
+    """
+    columns = {name: {field: [] for field in schema.names}
+               for name, schema in STAGE_SCHEMAS.items()}
+    digest = hashlib.sha256()
+    seen = set()
+    for session in sessions:
+        session_id = str(session['id'])
+        if session_id in seen:
+            continue
+        seen.add(session_id)
+        session_hash = content_hash(session)
+        digest.update(session_hash.encode())
+        timestamps = [str(m['timestamp']) for m in session['messages'] if m.get('timestamp')]
+        last_timestamp = max(timestamps) if timestamps else None
+        for field, value in zip(STAGE_SCHEMAS["sessions"].names, (
+                session_id, session_hash, last_timestamp, len(session['messages']))):
+            columns["sessions"][field].append(value)
+        for i, msg in enumerate(session['messages']):
+            content = msg['content']
+            if content is not None and not isinstance(content, str):
+                content = json.dumps(content, separators=(",", ":"))
+            for field, value in zip(STAGE_SCHEMAS["messages"].names, (
+                    f'{message_prefix}{session_id}_{i+1}', session_id,
+                    str(msg['timestamp']) if msg.get('timestamp') else None,
+                    msg['role'], content, i + 1)):
+                columns["messages"][field].append(value)
+    tables = {name: pa.table(columns[name], schema=schema)
+              for name, schema in STAGE_SCHEMAS.items()}
+    return tables, {"content_hash": digest.hexdigest(), "sessions": len(seen)}
+
+def check_staged(con, stage: str = ''):
+    """Raise ValueError if staged messages have timestamps DuckDB cannot parse"""
+    bad = con.execute(f"""
+        SELECT id, timestamp FROM {stage}stage_messages
+        WHERE timestamp IS NOT NULL AND TRY_CAST(timestamp AS TIMESTAMP) IS NULL
+        LIMIT 5
+    """).fetchall()
+    if bad:
+        raise ValueError("Unparseable message timestamps: "
+                         + ", ".join(f"{msg_id}={ts!r}" for msg_id, ts in bad))
+
+def stage_history_file(history_file: str, message_prefix: str, stage_path: str) -> Dict[str, Any]:
+    """Parse, validate and stage one history file into its own DuckDB database
+    
+    Runs in worker processes; returns the import summary for _merge_staged.
+    """
+    with open(history_file) as f:
+        sessions = json.load(f)
+    validate_sessions(sessions)
+    tables, summary = stage_sessions(sessions, message_prefix)
+    con = duckdb.connect(stage_path)
+    try:
+        for name, table in tables.items():
+            con.register('_stage', table)
+            con.execute(f"CREATE TABLE stage_{name} AS SELECT * FROM _stage")
+            con.unregister('_stage')
+        check_staged(con)
+    finally:
+        con.close()
+    return summary
+
+def print_changes(changes: List[Tuple[str, str, Optional[bool]]]):
+    marks = {'added': '+', 'removed': '-', 'modified': '~'}
+    for change, path, is_dir in changes:
+        print(f"{marks[change]} {path}{'/' if is_dir else ''}")
+    print(f"{len(changes)} changed paths")
+
 def main():
     db = ToposDB()
     db.init_schema()
@@ -303,19 +933,53 @@ def main():
     if not args:
         print("Available commands:")
         print("  python db_ops.py import-claude")
-        print("  python db_ops.py import-cline <history_file>")
+        print("  python db_ops.py import-cline <history_file>... [--workers N]")
         print("  python db_ops.py analyze")
+        print("  python db_ops.py diff <snapA> <snapB>   (snapshot id, conversation id, hash or 'latest')")
+        print("  python db_ops.py changes --since <timestamp>")
+        print("  python db_ops.py watch [--debounce S] [--snapshot-every S]")
     elif args[0] == 'import-claude':
         history_dir = os.path.expanduser("~/infinity-topos/.bmorphism")
         if db.import_claude_history(history_dir):
             print("Successfully imported Claude history")
     elif args[0] == 'import-cline':
-        if len(args) < 2:
-            print("Usage: python db_ops.py import-cline <history_file>")
-        elif db.import_cline_history(args[1]):
+        files, workers = args[1:], 1
+        if '--workers' in files:
+            at = files.index('--workers')
+            workers = int(files[at + 1]) if at + 1 < len(files) else 1
+            files = files[:at] + files[at + 2:]
+        if not files:
+            print("Usage: python db_ops.py import-cline <history_file>... [--workers N]")
+        elif db.import_cline_history(*files, workers=workers):
             print("Successfully imported Cline history")
     elif args[0] == 'analyze':
         db.analyze()
+    elif args[0] == 'diff':
+        if len(args) < 3:
+            print("Usage: python db_ops.py diff <snapA> <snapB>")
+        else:
+            try:
+                print_changes(db.diff(args[1], args[2]))
+            except ValueError as e:
+                print(f"Error: {e}")
+    elif args[0] == 'changes':
+        if len(args) < 3 or args[1] != '--since':
+            print("Usage: python db_ops.py changes --since <timestamp>")
+        else:
+            try:
+                base, changes = db.changes(args[2])
+                print(f"Changes since {base}:")
+                print_changes(changes)
+            except (ValueError, duckdb.ConversionException) as e:
+                print(f"Error: {e}")
+    elif args[0] == 'watch':
+        from workspace_watch import WorkspaceWatcher
+        options = dict(zip(args[1::2], args[2::2]))
+        watcher = WorkspaceWatcher(db, debounce=float(options.get('--debounce', 0.5)),
+                                   snapshot_every=float(options.get('--snapshot-every', 300)))
+        print("Watching workspaces; Ctrl-C to stop")
+        watcher.run()
+        print(f"Applied {watcher.applied} path updates")
     else:
         print(f"Unknown command: {args[0]}")
     
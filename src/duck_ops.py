@@ -1,17 +1,33 @@
 #!/usr/bin/env python3
+import argparse
 import duckdb
+import glob
+import hashlib
+import ijson
+import pyarrow as pa
 import sys
 import os
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+from db_ops import IMPORT_TABLES, content_hash
+
 DB_PATH = '../.bmorphism/topos.duckdb'
 os.makedirs('../.bmorphism', exist_ok=True)
 
+# Values of the message_role enum; other roles are kept in vertices.properties
+MESSAGE_ROLES = ('user', 'assistant', 'human', 'system', 'tool')
+
 def create_hypergraph_tables(con):
     """Create tables for hypergraph storage if they don't exist"""
-    con.execute("""
+    existing = {row[0] for row in con.execute("""
+        SELECT table_name FROM information_schema.tables WHERE table_schema = 'main'
+    """).fetchall()}
+    con.execute(f"""
+        CREATE TYPE IF NOT EXISTS message_role AS ENUM ({', '.join(f"'{r}'" for r in MESSAGE_ROLES)});
+        
         CREATE TABLE IF NOT EXISTS vertices (
             id VARCHAR PRIMARY KEY,
             properties JSON
@@ -30,161 +46,666 @@ def create_hypergraph_tables(con):
             ordering INTEGER,
             PRIMARY KEY (edge_id, vertex_id, role)
         );
+        
+        -- Typed columns of message vertices; vertices.properties keeps only
+        -- what does not fit them. conversation_id is the conversation's hyperedge.
+        CREATE TABLE IF NOT EXISTS message_vertices (
+            vertex_id VARCHAR PRIMARY KEY,
+            conversation_id VARCHAR,
+            ordinal INTEGER,
+            timestamp TIMESTAMP,
+            role message_role,
+            content VARCHAR
+        );
+        
+        CREATE TABLE IF NOT EXISTS vertex_degrees (
+            vertex_id VARCHAR PRIMARY KEY,
+            degree INTEGER
+        );
+        
+        CREATE TABLE IF NOT EXISTS edge_sizes (
+            edge_id VARCHAR PRIMARY KEY,
+            edge_type VARCHAR,
+            size INTEGER
+        );
+        
+        CREATE TABLE IF NOT EXISTS degree_histogram (
+            degree INTEGER PRIMARY KEY,
+            vertices BIGINT
+        );
+        
+        CREATE TABLE IF NOT EXISTS edge_size_histogram (
+            edge_type VARCHAR,
+            size INTEGER,
+            edges BIGINT,
+            PRIMARY KEY (edge_type, size)
+        );
+        
+        CREATE TABLE IF NOT EXISTS type_counts (
+            kind VARCHAR,
+            type VARCHAR,
+            count BIGINT,
+            PRIMARY KEY (kind, type)
+        );
+        
+        -- Inverted index over message_vertices.content for BM25 search
+        CREATE TABLE IF NOT EXISTS search_postings (
+            term VARCHAR,
+            vertex_id VARCHAR,
+            tf INTEGER
+        );
+        -- Lets search_messages fetch the postings of its terms without a full scan
+        CREATE INDEX IF NOT EXISTS search_postings_term_idx ON search_postings (term);
+        
+        CREATE TABLE IF NOT EXISTS search_documents (
+            vertex_id VARCHAR PRIMARY KEY,
+            length INTEGER
+        );
     """)
+    con.execute(IMPORT_TABLES)
+    # Databases created before statistics and the search index were maintained
+    if 'degree_histogram' not in existing:
+        refresh_statistics(con)
+    if 'search_documents' not in existing:
+        rebuild_search_index(con)
 
-def import_claude_desktop(con, history_dir):
-    """Import Claude Desktop history from .bmorphism directory"""
+# Materialized statistics. vertex_degrees and edge_sizes hold the current
+# degree of every vertex and size of every hyperedge so that each change
+# can move exactly the affected entities between histogram buckets;
+# analyze reads only the histograms and type_counts.
+def _bump(con, table, keys, value, source):
+    """Add the signed n of each group in source to a counter table"""
+    con.execute(f"""
+        INSERT INTO {table}
+        SELECT {keys}, sum(n) FROM ({source}) GROUP BY ALL HAVING sum(n) != 0
+        ON CONFLICT DO UPDATE SET {value} = {value} + excluded.{value}
+    """)
+    con.execute(f"DELETE FROM {table} WHERE {value} = 0")
+
+def _record_vertices(con, sign):
+    """Account for vertices _batch(id, ...) inserted (sign 1) or deleted (-1)"""
+    if sign > 0:
+        con.execute("INSERT INTO vertex_degrees SELECT id, 0 FROM _batch")
+        _bump(con, 'degree_histogram', 'degree', 'vertices',
+              "SELECT 0 AS degree, count(*) AS n FROM _batch")
+    else:
+        _bump(con, 'degree_histogram', 'degree', 'vertices', """
+            SELECT degree, -count(*) AS n FROM vertex_degrees
+            WHERE vertex_id IN (SELECT id FROM _batch) GROUP BY degree
+        """)
+        con.execute("DELETE FROM vertex_degrees WHERE vertex_id IN (SELECT id FROM _batch)")
+    _bump(con, 'type_counts', 'kind, type', 'count',
+          f"SELECT 'vertex' AS kind, '*' AS type, {sign:d} * count(*) AS n FROM _batch")
+
+def _record_hyperedges(con, sign):
+    """Account for hyperedges _batch(id, edge_type, ...) inserted (sign 1),
+    which start empty, or deleted (-1)"""
+    if sign > 0:
+        con.execute("INSERT INTO edge_sizes SELECT id, coalesce(edge_type, ''), 0 FROM _batch")
+        edges = "SELECT coalesce(edge_type, '') AS edge_type, 0 AS size FROM _batch"
+    else:
+        edges = """
+            SELECT edge_type, size FROM edge_sizes WHERE edge_id IN (SELECT id FROM _batch)
+        """
+    _bump(con, 'edge_size_histogram', 'edge_type, size', 'edges', f"""
+        SELECT edge_type, size, {sign:d} * count(*) AS n FROM ({edges}) GROUP BY ALL
+    """)
+    _bump(con, 'type_counts', 'kind, type', 'count', f"""
+        SELECT 'hyperedge' AS kind, edge_type AS type, {sign:d} * count(*) AS n
+        FROM ({edges}) GROUP BY ALL
+    """)
+    if sign < 0:
+        con.execute("DELETE FROM edge_sizes WHERE edge_id IN (SELECT id FROM _batch)")
+
+def _record_incidence(con, sign):
+    """Move the vertices and hyperedges of incidences _batch(edge_id,
+    vertex_id, role, ...) inserted (sign 1) or deleted (-1) between buckets"""
+    for entities, key, column, histogram, prefix, value in (
+            ('vertex_degrees', 'vertex_id', 'degree', 'degree_histogram', '', 'vertices'),
+            ('edge_sizes', 'edge_id', 'size', 'edge_size_histogram', 'edge_type, ', 'edges')):
+        change = f"SELECT {key}, {sign:d} * count(*) AS change FROM _batch GROUP BY {key}"
+        _bump(con, histogram, prefix + column, value, f"""
+            SELECT {prefix}{column}, -1 AS n FROM {entities} JOIN ({change}) USING ({key})
+            UNION ALL
+            SELECT {prefix}{column} + change, 1 FROM {entities} JOIN ({change}) USING ({key})
+        """)
+        con.execute(f"""
+            UPDATE {entities} SET {column} = {column} + d.change
+            FROM ({change}) d WHERE {entities}.{key} = d.{key}
+        """)
+    _bump(con, 'type_counts', 'kind, type', 'count', f"""
+        SELECT 'incidence' AS kind, coalesce(role, '') AS type, {sign:d} * count(*) AS n
+        FROM _batch GROUP BY ALL
+    """)
+
+RECORD_STATISTICS = {
+    'vertices': _record_vertices,
+    'hyperedges': _record_hyperedges,
+    'incidence': _record_incidence,
+}
+
+def record_rows(con, table, columns, rows, sign=1):
+    """Update the statistics for rows inserted into or deleted from table"""
+    if not rows:
+        return
+    con.register('_batch', pa.table({col: [row[i] for row in rows]
+                                     for i, col in enumerate(columns)}))
+    try:
+        RECORD_STATISTICS[table](con, sign)
+    finally:
+        con.unregister('_batch')
+
+# Search terms are maximal runs of letters and digits, lowercased
+TOKEN_SEPARATORS = r'[^\p{L}\p{N}]+'
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Postings and document lengths for the messages in _batch(id, content, ...)
+INDEX_MESSAGES = f"""
+    CREATE OR REPLACE TEMP TABLE _terms AS
+    SELECT id AS vertex_id, term
+    FROM (SELECT id, unnest(regexp_split_to_array(lower(content), '{TOKEN_SEPARATORS}')) AS term
+          FROM _batch)
+    WHERE term != '';
+    INSERT INTO search_postings SELECT term, vertex_id, count(*) FROM _terms GROUP BY ALL;
+    INSERT INTO search_documents SELECT vertex_id, count(*) FROM _terms GROUP BY ALL;
+    DROP TABLE _terms;
+"""
+UNINDEX_MESSAGES = """
+    DELETE FROM search_postings WHERE vertex_id IN (SELECT id FROM _batch);
+    DELETE FROM search_documents WHERE vertex_id IN (SELECT id FROM _batch);
+"""
+
+def rebuild_search_index(con):
+    """Rebuild the search index from message_vertices"""
+    con.begin()
     try:
-        # Clear existing data
-        con.execute("DELETE FROM incidence")
-        con.execute("DELETE FROM vertices")
-        con.execute("DELETE FROM hyperedges")
-        
-        # Create a temporary table for the raw data
-        con.execute("""
-            CREATE TEMP TABLE IF NOT EXISTS temp_claude_history AS
-            SELECT * FROM read_json_auto(?)
-        """, [str(Path(history_dir) / "anthropic-data-2025-01-19-22-13-28/conversations.json")])
-        
-        # Process each conversation into our hypergraph structure
         con.execute("""
-            WITH conversation_data AS (
-                SELECT 
-                    json_extract_string(conv.value, '$.id') as conversation_id,
-                    json_extract_string(msg.value, '$.timestamp')::TIMESTAMP as timestamp,
-                    json_extract_string(msg.value, '$.role') as role,
-                    json_extract_string(msg.value, '$.content') as content
-                FROM temp_claude_history,
-                UNNEST(json_extract(conversations, '$[*]')) AS conv(value),
-                UNNEST(json_extract(conv.value, '$.messages[*]')) AS msg(value)
-            )
-            INSERT INTO vertices (id, properties)
-            SELECT 
-                'msg_' || conversation_id || '_' || row_number() over (partition by conversation_id order by timestamp),
-                json_object('timestamp', timestamp, 'role', role, 'content', content)
-            FROM conversation_data
-        """)
-        
-        # Create hyperedges for conversations
+            DELETE FROM search_postings;
+            DELETE FROM search_documents;
+            CREATE TEMP TABLE _batch AS SELECT vertex_id AS id, content FROM message_vertices;
+        """ + INDEX_MESSAGES + "DROP TABLE _batch;")
+    except BaseException:
+        con.rollback()
+        raise
+    con.commit()
+
+def search_messages(con, terms, since=None, until=None, limit=10):
+    """Messages matching any of terms, ranked by BM25
+    
+    since and until bound the message timestamp (inclusive, exclusive);
+    without them, messages with no timestamp are included.
+    Returns a DataFrame of vertex_id, conversation_id, timestamp, role,
+    score and the start of the content.
+    """
+    return con.execute(f"""
+        WITH query AS (
+            SELECT DISTINCT term
+            FROM (SELECT unnest(regexp_split_to_array(lower($1), '{TOKEN_SEPARATORS}')) AS term)
+            WHERE term != ''
+        ),
+        corpus AS (SELECT count(*) AS n, avg(length) AS avgdl FROM search_documents),
+        matches AS (
+            SELECT p.* FROM search_postings p JOIN query USING (term)
+        ),
+        idf AS (
+            SELECT term, ln(1 + (corpus.n - count(*) + 0.5) / (count(*) + 0.5)) AS idf
+            FROM matches, corpus GROUP BY term, corpus.n
+        ),
+        scores AS (
+            SELECT m.vertex_id,
+                   sum(idf.idf * m.tf * ({BM25_K1} + 1)
+                       / (m.tf + {BM25_K1} * (1 - {BM25_B} + {BM25_B} * d.length / corpus.avgdl))) AS score
+            FROM matches m
+            JOIN idf USING (term)
+            JOIN search_documents d USING (vertex_id), corpus
+            GROUP BY m.vertex_id
+        )
+        SELECT mv.vertex_id, mv.conversation_id, mv.timestamp, mv.role,
+               round(s.score, 4) AS score, left(mv.content, 120) AS content
+        FROM scores s JOIN message_vertices mv USING (vertex_id)
+        WHERE ($2::TIMESTAMP IS NULL OR mv.timestamp >= $2::TIMESTAMP)
+          AND ($3::TIMESTAMP IS NULL OR mv.timestamp < $3::TIMESTAMP)
+        ORDER BY s.score DESC, mv.vertex_id
+        LIMIT $4
+    """, [terms, since, until, limit]).df()
+
+def refresh_statistics(con):
+    """Recompute every statistics table from vertices, hyperedges and incidence"""
+    con.begin()
+    try:
         con.execute("""
-            WITH conversation_vertices AS (
-                SELECT DISTINCT 
-                    json_extract_string(conv.value, '$.id') as conversation_id
-                FROM temp_claude_history,
-                UNNEST(json_extract(conversations, '$[*]')) AS conv(value)
-            )
-            INSERT INTO hyperedges (id, edge_type, properties)
-            SELECT 
-                'conversation_' || conversation_id,
-                'conversation',
-                json_object('source', 'claude_desktop')
-            FROM conversation_vertices
+            DELETE FROM vertex_degrees;
+            DELETE FROM edge_sizes;
+            DELETE FROM degree_histogram;
+            DELETE FROM edge_size_histogram;
+            DELETE FROM type_counts;
+            
+            INSERT INTO vertex_degrees
+            SELECT v.id, count(i.vertex_id) FROM vertices v
+            LEFT JOIN incidence i ON i.vertex_id = v.id GROUP BY v.id;
+            
+            INSERT INTO edge_sizes
+            SELECT e.id, coalesce(e.edge_type, ''), count(i.edge_id) FROM hyperedges e
+            LEFT JOIN incidence i ON i.edge_id = e.id GROUP BY e.id, e.edge_type;
+            
+            INSERT INTO degree_histogram
+            SELECT degree, count(*) FROM vertex_degrees GROUP BY degree;
+            
+            INSERT INTO edge_size_histogram
+            SELECT edge_type, size, count(*) FROM edge_sizes GROUP BY edge_type, size;
+            
+            INSERT INTO type_counts
+            SELECT 'vertex', '*', count(*) FROM vertices HAVING count(*) > 0
+            UNION ALL
+            SELECT 'hyperedge', coalesce(edge_type, ''), count(*) FROM hyperedges GROUP BY ALL
+            UNION ALL
+            SELECT 'incidence', coalesce(role, ''), count(*) FROM incidence GROUP BY ALL;
         """)
+    except BaseException:
+        con.rollback()
+        raise
+    con.commit()
+
+# Rows buffered per table before they are appended as one Arrow batch
+BATCH_ROWS = 50_000
+NDJSON_SUFFIXES = ('.ndjson', '.jsonl')
+
+# Staging columns and the statement that moves a staged batch into its
+# table, in foreign-key order. Message vertices of changed conversations
+# are updated in place: DuckDB cannot delete and re-insert a row that is
+# still referenced by a foreign key within one transaction.
+MESSAGE_COLUMNS = ('id', 'conversation_id', 'ordinal', 'timestamp', 'role', 'content')
+# Message fields that do not fit their typed column, as vertex properties
+RESIDUAL_PROPERTIES = """nullif(json_merge_patch(
+        CASE WHEN TRY_CAST(timestamp AS TIMESTAMP) IS NULL AND timestamp IS NOT NULL
+             THEN json_object('timestamp', timestamp) ELSE '{}' END,
+        CASE WHEN TRY_CAST(role AS message_role) IS NULL AND role IS NOT NULL
+             THEN json_object('role', role) ELSE '{}' END), '{}')"""
+UPSERT_MESSAGES = """
+    INSERT OR REPLACE INTO message_vertices
+    SELECT id, conversation_id, ordinal, TRY_CAST(timestamp AS TIMESTAMP),
+           TRY_CAST(role AS message_role), content
+    FROM _batch
+"""
+APPEND_SQL = {
+    'vertices': (MESSAGE_COLUMNS, f"""
+        INSERT INTO vertices (id, properties)
+        SELECT id, {RESIDUAL_PROPERTIES}
+        FROM _batch;
+    """ + UPSERT_MESSAGES + ";" + INDEX_MESSAGES),
+    'vertex_updates': (MESSAGE_COLUMNS, f"""
+        UPDATE vertices SET properties = b.properties
+        FROM (SELECT id, {RESIDUAL_PROPERTIES} AS properties FROM _batch) b
+        WHERE vertices.id = b.id;
+    """ + UPSERT_MESSAGES + ";" + UNINDEX_MESSAGES + INDEX_MESSAGES),
+    'hyperedges': (('id', 'edge_type', 'properties'), """
+        INSERT INTO hyperedges (id, edge_type, properties)
+        SELECT id, edge_type, properties::JSON FROM _batch
+    """),
+    'incidence': (('edge_id', 'vertex_id', 'role', 'ordering'), """
+        INSERT INTO incidence (edge_id, vertex_id, role, ordering)
+        SELECT edge_id, vertex_id, role, ordering FROM _batch
+    """),
+    'import_conversations': (('source', 'conversation_id', 'content_hash',
+                              'last_timestamp', 'message_count'), """
+        INSERT OR REPLACE INTO import_conversations
+        SELECT source, conversation_id, content_hash,
+               TRY_CAST(last_timestamp AS TIMESTAMP), message_count
+        FROM _batch
+    """),
+}
+
+def iter_json_records(path, prefix='item'):
+    """Yield the records of a JSON export one at a time
+    
+    NDJSON files (.ndjson/.jsonl) are read line by line; other files are
+    parsed incrementally with ijson, yielding the items found at prefix
+    (e.g. 'item' for a top-level array).
+    """
+    with open(path, 'rb') as f:
+        if Path(path).suffix.lower() in NDJSON_SUFFIXES:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from ijson.items(f, prefix, use_float=True)
+
+class BatchAppender:
+    """Buffers rows per table and appends them as Arrow record batches"""
+    
+    def __init__(self, con, batch_rows=BATCH_ROWS):
+        self.con = con
+        self.batch_rows = batch_rows
+        self.buffers = {table: [] for table in APPEND_SQL}
+        self.counts = {table: 0 for table in APPEND_SQL}
+    
+    def add(self, table, row):
+        buffer = self.buffers[table]
+        buffer.append(row)
+        if len(buffer) >= self.batch_rows:
+            self.flush()
+    
+    def flush(self):
+        """Append every buffered row, parents before incidence rows"""
+        for table, (columns, sql) in APPEND_SQL.items():
+            rows = self.buffers[table]
+            if not rows:
+                continue
+            batch = pa.table({col: [row[i] for row in rows]
+                              for i, col in enumerate(columns)})
+            self.con.register('_batch', batch)
+            try:
+                self.con.execute(sql)
+                if table in RECORD_STATISTICS:
+                    RECORD_STATISTICS[table](self.con, 1)
+            finally:
+                self.con.unregister('_batch')
+            self.counts[table] += len(rows)
+            self.buffers[table] = []
+
+def _message_text(value):
+    """Message fields as stored: strings as-is, structured content as JSON"""
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value, separators=(",", ":"))
+
+def _stream_import(con, records, edge_prefix, edge_type, message_prefix, source):
+    """Upsert each new or changed conversation and its messages in a single pass
+    
+    Conversations whose content hash matches the one recorded for this
+    source in import_conversations are skipped. Message ids are assigned
+    per conversation in timestamp order, so incidence rows are written
+    alongside the vertices instead of being joined back afterwards.
+    Returns the appended row counts and the ids of message vertices left
+    without incidences by changed conversations.
+    """
+    # Keyed by target as well, so db_ops imports of the same source are separate
+    key = f"hypergraph:{source}"
+    known = dict(con.execute("""
+        SELECT conversation_id, content_hash FROM import_conversations WHERE source = ?
+    """, [key]).fetchall())
+    # Conversations imported before import_conversations existed are upserted too
+    existing = {row[0] for row in con.execute(
+        "SELECT id FROM hyperedges WHERE edge_type = ?", [edge_type]).fetchall()}
+    appender = BatchAppender(con)
+    digest = hashlib.sha256()
+    seen, stale, unlinked_rows = set(), [], []
+    unchanged = 0
+    for record in records:
+        conversation_id = str(record.get('id'))
+        if conversation_id in seen:
+            continue
+        seen.add(conversation_id)
+        record_hash = content_hash(record)
+        digest.update(record_hash.encode())
+        messages = sorted(record.get('messages') or [],
+                          key=lambda m: (m.get('timestamp') is None, str(m.get('timestamp'))))
+        timestamps = [str(m['timestamp']) for m in messages if m.get('timestamp') is not None]
+        last_timestamp = timestamps[-1] if timestamps else None
+        if known.get(conversation_id) == record_hash:
+            unchanged += 1
+            continue
         
-        # Link messages to conversations in incidence table
+        edge_id = f"{edge_prefix}{conversation_id}"
+        vertex_ids = [f"{message_prefix}{conversation_id}_{n}"
+                      for n in range(1, len(messages) + 1)]
+        stored = set()
+        if edge_id in existing:
+            removed = con.execute("""
+                DELETE FROM incidence WHERE edge_id = ? RETURNING edge_id, vertex_id, role
+            """, [edge_id]).fetchall()
+            unlinked_rows += removed
+            unlinked = {row[1] for row in removed}
+            stored = {row[0] for row in con.execute(
+                "SELECT id FROM vertices WHERE id IN (SELECT unnest(?::VARCHAR[]))",
+                [vertex_ids]).fetchall()}
+            stale += unlinked.difference(vertex_ids)
+        else:
+            appender.add('hyperedges', (edge_id, edge_type, json.dumps({'source': source})))
+        for ordinal, (vertex_id, message) in enumerate(zip(vertex_ids, messages), 1):
+            appender.add('vertex_updates' if vertex_id in stored else 'vertices',
+                         (vertex_id, edge_id, ordinal, _message_text(message.get('timestamp')),
+                          _message_text(message.get('role')),
+                          _message_text(message.get('content'))))
+            appender.add('incidence', (edge_id, vertex_id, 'message', ordinal))
+        appender.add('import_conversations', (key, conversation_id, record_hash,
+                                              last_timestamp, len(messages)))
+    appender.flush()
+    record_rows(con, 'incidence', ('edge_id', 'vertex_id', 'role'), unlinked_rows, -1)
+    con.execute("""
+        INSERT OR REPLACE INTO import_watermarks
+            (source, content_hash, conversations, imported_at)
+        VALUES (?, ?, ?, now())
+    """, [key, digest.hexdigest(), len(seen)])
+    return dict(appender.counts, unchanged=unchanged), stale
+
+def _import_stream(con, records, *args):
+    """Incrementally import records in one transaction
+    
+    Message vertices orphaned by shortened conversations are removed after
+    the commit, since DuckDB rejects deleting them in the transaction that
+    removed their incidences.
+    """
+    con.begin()
+    try:
+        counts, stale = _stream_import(con, records, *args)
+    except BaseException:
+        con.rollback()
+        raise
+    con.commit()
+    if stale:
+        con.begin()
+        try:
+            removed = con.execute("""
+                DELETE FROM vertices
+                WHERE id IN (SELECT unnest(?::VARCHAR[]))
+                  AND id NOT IN (SELECT vertex_id FROM incidence)
+                RETURNING id
+            """, [stale]).fetchall()
+            record_rows(con, 'vertices', ('id',), removed, -1)
+            for table in ('message_vertices', 'search_postings', 'search_documents'):
+                con.execute(f"DELETE FROM {table} WHERE vertex_id IN (SELECT unnest(?::VARCHAR[]))",
+                            [[row[0] for row in removed]])
+        except BaseException:
+            con.rollback()
+            raise
+        con.commit()
+    return counts
+
+def migrate_messages(con):
+    """Move message fields of vertices in the JSON layout into message_vertices
+    
+    Message vertices (those with a 'message' incidence) without a
+    message_vertices row are converted in one transaction; their
+    vertices.properties keep only the residual fields. Returns the number
+    of vertices migrated.
+    """
+    con.begin()
+    try:
         con.execute("""
-            WITH msg_edges AS (
-                SELECT 
-                    'conversation_' || json_extract_string(conv.value, '$.id') as edge_id,
-                    v.id as vertex_id,
-                    row_number() over (partition by json_extract_string(conv.value, '$.id') order by json_extract(v.properties, '$.timestamp')) as msg_order
-                FROM temp_claude_history,
-                UNNEST(json_extract(conversations, '$[*]')) AS conv(value)
-                JOIN vertices v ON v.id LIKE 'msg_' || json_extract_string(conv.value, '$.id') || '_%'
-            )
-            INSERT INTO incidence (edge_id, vertex_id, role, ordering)
-            SELECT edge_id, vertex_id, 'message', msg_order
-            FROM msg_edges
+            CREATE TEMP TABLE _batch AS
+            SELECT v.id, i.edge_id AS conversation_id, i.ordering AS ordinal,
+                   json_extract_string(v.properties, '$.timestamp') AS timestamp,
+                   json_extract_string(v.properties, '$.role') AS role,
+                   json_extract_string(v.properties, '$.content') AS content
+            FROM vertices v
+            JOIN incidence i ON i.vertex_id = v.id AND i.role = 'message'
+            WHERE v.id NOT IN (SELECT vertex_id FROM message_vertices)
         """)
-        
-        con.execute("DROP TABLE temp_claude_history")
+        migrated = con.execute("SELECT count(*) FROM _batch").fetchone()[0]
+        con.execute(APPEND_SQL['vertex_updates'][1])
+        con.execute("DROP TABLE _batch")
+    except BaseException:
+        con.rollback()
+        raise
+    con.commit()
+    return migrated
+
+def import_claude_desktop(con, history_dir):
+    """Import new and changed Claude Desktop conversations from .bmorphism directory"""
+    try:
+        export = Path(history_dir) / "anthropic-data-2025-01-19-22-13-28/conversations.json"
+        counts = _import_stream(con, iter_json_records(export, 'conversations.item'),
+                                'conversation_', 'conversation', 'msg_',
+                                'claude_desktop')
+        print(f"Imported {counts['import_conversations']} new or changed conversations "
+              f"({counts['unchanged']} unchanged), "
+              f"{counts['vertices'] + counts['vertex_updates']} messages")
         return True
     except Exception as e:
         print(f"Error importing Claude Desktop history: {e}")
         return False
 
 def import_cline_history(con, history_file):
-    """Import Cline session history"""
+    """Import new and changed Cline sessions"""
     try:
-        # Clear existing data
-        con.execute("DELETE FROM incidence")
-        con.execute("DELETE FROM vertices")
-        con.execute("DELETE FROM hyperedges")
-        
-        # Create a temporary table for the raw data
-        con.execute("""
-            CREATE TEMP TABLE IF NOT EXISTS temp_cline_history AS
-            SELECT * FROM read_json_auto(?)
-        """, [history_file])
-        
-        # Process messages into vertices
-        con.execute("""
-            WITH message_data AS (
-                SELECT 
-                    t.id as session_id,
-                    json_extract_string(msg.value, '$.timestamp')::TIMESTAMP as timestamp,
-                    json_extract_string(msg.value, '$.role') as role,
-                    json_extract_string(msg.value, '$.content') as content
-                FROM temp_cline_history t,
-                UNNEST(json_extract(t.messages, '$[*]')) AS msg(value)
-            )
-            INSERT INTO vertices (id, properties)
-            SELECT 
-                'cline_msg_' || session_id || '_' || row_number() over (partition by session_id order by timestamp),
-                json_object('timestamp', timestamp, 'role', role, 'content', content)
-            FROM message_data
-        """)
-        
-        # Create hyperedges for sessions
-        con.execute("""
-            WITH session_vertices AS (
-                SELECT DISTINCT id as session_id
-                FROM temp_cline_history
-            )
-            INSERT INTO hyperedges (id, edge_type, properties)
-            SELECT 
-                'session_' || session_id,
-                'session',
-                json_object('source', 'cline')
-            FROM session_vertices
-        """)
-        
-        # Link messages to sessions
-        con.execute("""
-            WITH msg_edges AS (
-                SELECT 
-                    'session_' || t.id as edge_id,
-                    v.id as vertex_id,
-                    row_number() over (partition by t.id order by json_extract(v.properties, '$.timestamp')) as msg_order
-                FROM temp_cline_history t
-                JOIN vertices v ON v.id LIKE 'cline_msg_' || t.id || '_%'
-            )
-            INSERT INTO incidence (edge_id, vertex_id, role, ordering)
-            SELECT edge_id, vertex_id, 'message', msg_order
-            FROM msg_edges
-        """)
-        
-        con.execute("DROP TABLE temp_cline_history")
+        counts = _import_stream(con, iter_json_records(history_file),
+                                'session_', 'session', 'cline_msg_', 'cline')
+        print(f"Imported {counts['import_conversations']} new or changed sessions "
+              f"({counts['unchanged']} unchanged), "
+              f"{counts['vertices'] + counts['vertex_updates']} messages")
         return True
     except Exception as e:
         print(f"Error importing Cline history: {e}")
         return False
 
-def import_data(con, file_path):
-    """Import data from various file formats"""
-    ext = Path(file_path).suffix.lower()
-    table_name = Path(file_path).stem
+# Multi-file reader for each importable suffix
+READERS = {
+    '.csv': 'read_csv_auto',
+    '.parquet': 'read_parquet',
+    '.json': 'read_json_auto',
+    '.ndjson': 'read_json_auto',
+    '.jsonl': 'read_json_auto',
+}
+# Files scanned per worker task; also the granularity of progress reports
+FILES_PER_TASK = 16
+IMPORT_WORKERS = min(8, os.cpu_count() or 1)
+
+def _quote_ident(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+def _is_remote(source):
+    return '://' in source
+
+def _is_glob(source):
+    return any(c in source for c in '*?[')
+
+def _table_name(source):
+    """Default table for a source: the file stem, or the directory a
+    directory or glob pattern names"""
+    parts = Path(source).parts
+    if _is_glob(source):
+        parts = parts[:next(i for i, part in enumerate(parts) if _is_glob(part))]
+        return parts[-1] if parts else 'import'
+    path = Path(source)
+    return path.name if path.is_dir() else path.stem
+
+def expand_sources(source):
+    """Files named by a path, directory or glob pattern, grouped by reader
     
-    if ext == '.csv':
-        con.execute(f"CREATE TABLE {table_name} AS SELECT * FROM read_csv_auto('{file_path}')")
-    elif ext == '.parquet':
-        con.execute(f"CREATE TABLE {table_name} AS SELECT * FROM read_parquet('{file_path}')")
-    elif ext == '.json':
-        con.execute(f"CREATE TABLE {table_name} AS SELECT * FROM read_json_auto('{file_path}')")
+    Local globs and directories are expanded here so their files can be
+    split across workers; remote URLs are passed to DuckDB as-is, which
+    expands any glob in them itself.
+    """
+    if _is_remote(source):
+        files = [source]
+    elif _is_glob(source):
+        files = sorted(glob.glob(source, recursive=True))
+    elif Path(source).is_dir():
+        files = sorted(str(p) for p in Path(source).rglob('*'))
     else:
-        print(f"Unsupported file format: {ext}")
-        return False
-    return True
+        files = [source]
+    groups = {}
+    for file in files:
+        reader = READERS.get(Path(file).suffix.lower())
+        if reader and (_is_remote(file) or Path(file).is_file()):
+            groups.setdefault(reader, []).append(file)
+    return groups
+
+def _reconcile_schema(con, table, reader, files):
+    """Create table, or add and widen its columns, so every file fits
+    
+    Conflicting column types are widened to the type DuckDB unifies them
+    to in a UNION, the same rule union_by_name applies across files.
+    """
+    columns = con.execute(f"DESCRIBE SELECT * FROM {reader}(?, union_by_name = true)",
+                          [files]).fetchall()
+    existing = {name.lower(): (name, dtype) for name, dtype in con.execute("""
+        SELECT column_name, data_type FROM information_schema.columns
+        WHERE table_schema = 'main' AND table_name = ?
+        ORDER BY ordinal_position
+    """, [table]).fetchall()}
+    if not existing:
+        con.execute(f"CREATE TABLE {_quote_ident(table)} (%s)" % ', '.join(
+            f"{_quote_ident(name)} {dtype}" for name, dtype, *_ in columns))
+        return
+    for name, dtype, *_ in columns:
+        if name.lower() not in existing:
+            con.execute(f"ALTER TABLE {_quote_ident(table)} ADD COLUMN {_quote_ident(name)} {dtype}")
+            continue
+        current_name, current = existing[name.lower()]
+        if current == dtype:
+            continue
+        widened = con.execute(f"""
+            SELECT typeof(c) FROM (SELECT NULL::{current} AS c UNION ALL SELECT NULL::{dtype})
+            LIMIT 1
+        """).fetchone()[0]
+        if widened != current:
+            con.execute(f"ALTER TABLE {_quote_ident(table)} "
+                        f"ALTER COLUMN {_quote_ident(current_name)} TYPE {widened}")
+
+def _load_files(con, table, reader, files):
+    """Append one chunk of files on its own cursor; returns the row count"""
+    cursor = con.cursor()
+    try:
+        return cursor.execute(f"""
+            INSERT INTO {_quote_ident(table)} BY NAME
+            SELECT * FROM {reader}(?, union_by_name = true)
+        """, [files]).fetchone()[0]
+    finally:
+        cursor.close()
+
+def import_data(con, *sources, table=None, workers=IMPORT_WORKERS):
+    """Import CSV, Parquet and JSON files named by paths, directories or globs
+    
+    Each source is appended to table, or by default to a table named after
+    it, creating the table or reconciling its schema first. Files are
+    scanned in chunks of FILES_PER_TASK with DuckDB's multi-file readers
+    (union_by_name) on a pool of workers; each chunk commits on its own,
+    so chunks loaded before a failure are kept.
+    """
+    tasks = []
+    for source in sources:
+        groups = expand_sources(source)
+        if not groups:
+            print(f"No importable files in {source} (supported: {', '.join(READERS)})")
+            return False
+        target = table or _table_name(source)
+        for reader, files in groups.items():
+            _reconcile_schema(con, target, reader, files)
+            tasks += [(target, reader, files[i:i + FILES_PER_TASK])
+                      for i in range(0, len(files), FILES_PER_TASK)]
+    
+    total_files = sum(len(files) for _, _, files in tasks)
+    rows, done, failed = 0, 0, []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_load_files, con, *task): task for task in tasks}
+        for future in as_completed(futures):
+            target, _, files = futures[future]
+            try:
+                rows += future.result()
+            except Exception as e:
+                failed.append((target, files, e))
+            done += len(files)
+            elapsed = time.perf_counter() - start
+            print(f"\r{done}/{total_files} files, {rows:,} rows, "
+                  f"{rows / elapsed if elapsed else 0:,.0f} rows/s", end='', flush=True)
+    print()
+    for target, files, e in failed:
+        print(f"Error importing {len(files)} files into {target} (first: {files[0]}): {e}")
+    return not failed
 
 def insert_interaction(con, context_data):
     """Insert an interaction hyperedge with context vertices"""
@@ -213,6 +734,10 @@ def insert_interaction(con, context_data):
         VALUES (?, ?, 'context', 1)
     """, [interaction_id, context_id])
     
+    record_rows(con, 'vertices', ('id',), [(context_id,)])
+    record_rows(con, 'hyperedges', ('id', 'edge_type'), [(interaction_id, 'interaction')])
+    record_rows(con, 'incidence', ('edge_id', 'vertex_id', 'role'),
+                [(interaction_id, context_id, 'context')])
     return interaction_id, context_id
 
 def main():
@@ -238,12 +763,14 @@ def main():
                 print(con.sql(f"SELECT * FROM {table} LIMIT 5").df())
                 
         elif args[0] == 'import':
-            if len(args) < 2:
-                print("Usage: just duck import <file_path>")
-            else:
-                success = import_data(con, args[1])
-                if success:
-                    print(f"Successfully imported {args[1]}")
+            parser = argparse.ArgumentParser(prog="just duck import")
+            parser.add_argument("sources", nargs='+', metavar="path|dir|glob")
+            parser.add_argument("--table", help="append every source to this table")
+            parser.add_argument("--workers", type=int, default=IMPORT_WORKERS)
+            options = parser.parse_args(args[1:])
+            if import_data(con, *options.sources, table=options.table,
+                           workers=options.workers):
+                print(f"Successfully imported {', '.join(options.sources)}")
                     
         elif args[0] == 'query':
             # Execute custom query
@@ -252,34 +779,29 @@ def main():
             print(con.sql(query).df())
             
         elif args[0] == 'analyze':
-            # Analyze hypergraph properties
+            # Analyze hypergraph properties from the materialized statistics
             print("\n📈 Hypergraph Analysis")
+            if '--exact' in args[1:]:
+                refresh_statistics(con)
+                print("(statistics recomputed from incidence)")
+            
+            print("\nCounts by Type:")
+            print(con.sql("""
+                SELECT kind, type, count FROM type_counts ORDER BY kind, count DESC
+            """).df())
             
             # Vertex degree distribution
             print("\nVertex Degree Distribution:")
             print(con.sql("""
-                SELECT 
-                    v.id,
-                    COUNT(i.edge_id) as degree
-                FROM vertices v
-                LEFT JOIN incidence i ON v.id = i.vertex_id
-                GROUP BY v.id
-                ORDER BY degree DESC
-                LIMIT 10
+                SELECT degree, vertices FROM degree_histogram ORDER BY degree
             """).df())
             
             # Edge size distribution
             print("\nHyperedge Size Distribution:")
             print(con.sql("""
-                SELECT 
-                    e.edge_type,
-                    COUNT(DISTINCT i.vertex_id) as size,
-                    COUNT(*) as count
-                FROM hyperedges e
-                JOIN incidence i ON e.id = i.edge_id
-                GROUP BY e.edge_type, e.id
-                ORDER BY size DESC
-                LIMIT 10
+                SELECT edge_type, size, edges AS count
+                FROM edge_size_histogram
+                ORDER BY edge_type, size
             """).df())
             
         elif args[0] == 'interact':
@@ -299,6 +821,20 @@ def main():
             if import_claude_desktop(con, history_dir):
                 print("Successfully imported Claude Desktop history")
             
+        elif args[0] == 'search':
+            parser = argparse.ArgumentParser(prog="just duck search")
+            parser.add_argument("terms")
+            parser.add_argument("--since", help="only messages at or after this timestamp")
+            parser.add_argument("--until", help="only messages before this timestamp")
+            parser.add_argument("--limit", type=int, default=10)
+            options = parser.parse_args(args[1:])
+            print(search_messages(con, options.terms, options.since, options.until,
+                                  options.limit))
+            
+        elif args[0] == 'migrate-messages':
+            migrated = migrate_messages(con)
+            print(f"Migrated {migrated} message vertices to message_vertices")
+            
         elif args[0] == 'import-cline':
             if len(args) < 2:
                 print("Usage: just duck import-cline <history_file>")
@@ -309,11 +845,15 @@ def main():
         else:
             print("Available commands:")
             print("  just duck                   - Show database overview")
-            print("  just duck import <file>     - Import generic data file")
+            print("  just duck import <path|dir|glob>... [--table NAME] [--workers N]")
+            print("                              - Import CSV/Parquet/JSON files")
             print("  just duck import-claude     - Import Claude Desktop history")
             print("  just duck import-cline <file> - Import Cline history file")
+            print("  just duck search \"terms\" [--since TS] [--until TS] [--limit N]")
+            print("                              - Rank messages by BM25")
+            print("  just duck migrate-messages  - Move JSON message properties to typed columns")
             print("  just duck query \"SQL\"      - Execute custom SQL query")
-            print("  just duck analyze          - Show hypergraph metrics")
+            print("  just duck analyze [--exact] - Show hypergraph metrics")
             print("  just duck interact <file>  - Insert interaction from JSON")
             
     except Exception as e:
@@ -1,6 +1,5 @@
 #!/usr/bin/env python3
 import duckdb
-import json
 import random
 from pathlib import Path
 from datetime import datetime
@@ -12,6 +11,8 @@ from textual.widgets.tree import TreeNode
 from rich.syntax import Syntax
 from rich.text import Text
 
+from db_ops import workspace_children
+
 class FileViewer(Static):
     def __init__(self, path: str = "", content: str = ""):
         super().__init__()
@@ -109,16 +110,8 @@ class RandomWalkApp(App):
         return random.choice(workspaces)
         
     def get_workspace_children(self, workspace: str) -> List[Dict[str, Any]]:
-        result = self.duck_conn.sql(f"""
-            SELECT {workspace}_tree::json->'children' as children
-            FROM workspace_snapshots
-            ORDER BY timestamp DESC
-            LIMIT 1
-        """).df()
-        
-        if len(result) > 0 and result['children'][0]:
-            return json.loads(result['children'][0])
-        return []
+        children = workspace_children(self.duck_conn, workspace.replace('_', '-'))
+        return [child for child in children if 'name' in child]
         
     def take_random_step(self) -> None:
         workspace = self.get_random_workspace()
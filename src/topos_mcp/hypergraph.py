@@ -1,14 +1,32 @@
 #!/usr/bin/env python3
 
-from typing import Any, Dict, List, Optional, Set, Tuple, Union
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+from contextlib import contextmanager
+import bisect
 import json
+import operator
+import os
+import queue
+import tempfile
+import threading
 import networkx as nx
-import discopy as dc
+from discopy.monoidal import Box, Diagram, Ty
 import kuzu
 import duckdb
+import pyarrow as pa
+import pyarrow.parquet as pq
+import shapely
 import shapely.geometry as geom
+from shapely.strtree import STRtree
+from array import array
 from dataclasses import dataclass, field
+from pathlib import Path
 from abc import ABC, abstractmethod
+import uuid
+import numpy as np
+import scipy.sparse as sp
+from .mutation_log import MutationLog
+from .query_engine import QueryEngine
 
 @dataclass
 class HyperEdge:
@@ -16,10 +34,184 @@ class HyperEdge:
     vertices: Set[str]
     attributes: Dict[str, Any] = field(default_factory=dict)
     geometry: Optional[geom.base.BaseGeometry] = None
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+def _clique_pairs(vertices: Set[str]) -> List[Tuple[str, str]]:
+    """Binary edges of the clique expansion of a hyperedge"""
+    vertices = list(vertices)
+    return [(vertices[i], vertices[j])
+            for i in range(len(vertices))
+            for j in range(i + 1, len(vertices))]
+
+def _gather(ptr: np.ndarray, values: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """Concatenate the CSR rows of values selected by rows, without a Python loop"""
+    starts = ptr[rows]
+    lengths = ptr[rows + 1] - starts
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return values[offsets + np.arange(lengths.sum())]
+
+def _encode_value(value: Any) -> Any:
+    """JSON fallback for attribute values: geometries as hex WKB, sets as lists"""
+    if isinstance(value, geom.base.BaseGeometry):
+        return {"__wkb__": shapely.to_wkb(value, hex=True)}
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    return str(value)
+
+def _decode_value(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1 and "__wkb__" in obj:
+        return shapely.from_wkb(obj["__wkb__"])
+    return obj
+
+def dump_attrs(attrs: Dict[str, Any]) -> str:
+    """Serialize an attribute dict, keeping geometries"""
+    return json.dumps(attrs, default=_encode_value)
+
+def load_attrs(text: str) -> Dict[str, Any]:
+    """Inverse of dump_attrs"""
+    return json.loads(text, object_hook=_decode_value)
+
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_ARRAYS = ('edge_ptr', 'edge_vertices', 'vertex_ptr', 'vertex_edges')
+
+def _write_arrow(path: Path, columns: Dict[str, List[Any]]):
+    table = pa.table(columns)
+    with pa.OSFile(str(path), 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+def _read_arrow(path: Path) -> pa.Table:
+    with pa.memory_map(str(path), 'r') as source:
+        return pa.ipc.open_file(source).read_all()
+
+# Operators accepted as attribute__op predicate suffixes; a bare attribute means eq
+PREDICATE_OPS = ('eq', 'ne', 'lt', 'le', 'gt', 'ge', 'in')
+
+def parse_predicates(predicates: Dict[str, Any]) -> List[Tuple[str, str, Any]]:
+    """Split keyword predicates such as weight__ge=3 into (attribute, op, value)"""
+    parsed = []
+    for key, value in predicates.items():
+        attribute, sep, op = key.rpartition('__')
+        if not sep or op not in PREDICATE_OPS:
+            attribute, op = key, 'eq'
+        parsed.append((attribute, op, value))
+    return parsed
+
+# Values compare only within a kind; ints and floats are both numbers
+COMPARISON_KINDS = {str: str, bool: bool, int: float, float: float}
+
+def _kind(value: Any) -> Optional[type]:
+    """Comparison kind of an attribute value or operand, None if it never matches"""
+    return COMPARISON_KINDS.get(type(value))
+
+def _matches(attrs: Dict[str, Any], attribute: str, op: str, value: Any) -> bool:
+    stored = attrs.get(attribute)
+    kind = _kind(stored)
+    if kind is None:
+        return False
+    if op == 'in':
+        return any(_kind(v) is kind and stored == v for v in value)
+    return _kind(value) is kind and getattr(operator, op)(stored, value)
+
+# Attribute types that can be indexed, by name
+INDEX_DTYPES = {'str': str, 'int': int, 'float': float, 'bool': bool}
+
+def _typed_value(attrs: Dict[str, Any], attribute: str, dtype: type) -> Any:
+    """An attribute value as dtype, or None if it is absent or of another type"""
+    value = attrs.get(attribute)
+    if isinstance(value, bool) and dtype is not bool:
+        return None
+    if dtype is float and isinstance(value, int):
+        return float(value)
+    return value if isinstance(value, dtype) else None
+
+class AttributeIndex:
+    """Typed column of one attribute with a hash or sorted index over it
+    
+    Values are extracted from the attribute dict at insert time; values that
+    are not of the declared dtype are left out, so they never match
+    predicates on this attribute. Operands are compared by COMPARISON_KINDS,
+    so an int index matches float operands of equal value. Hash indexes
+    answer eq and in; sorted indexes also answer range predicates by binary
+    search.
+    """
+    
+    KINDS = ('hash', 'sorted')
+    
+    def __init__(self, attribute: str, dtype: str = 'str', kind: str = 'hash'):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown index kind {kind!r}, expected one of {self.KINDS}")
+        if dtype not in INDEX_DTYPES:
+            raise ValueError(f"Unknown index dtype {dtype!r}, expected one of {tuple(INDEX_DTYPES)}")
+        self.attribute = attribute
+        self.dtype = INDEX_DTYPES[dtype]
+        self.kind = kind
+        self.column: Dict[int, Any] = {}
+        self.buckets: Dict[Any, Set[int]] = {}
+        self._keys: Optional[List[Any]] = None
+    
+    def add(self, row: int, attrs: Dict[str, Any]):
+        """Index (or re-index) a row from its attribute dict"""
+        old = self.column.pop(row, None)
+        if old is not None:
+            self.buckets[old].discard(row)
+        value = _typed_value(attrs, self.attribute, self.dtype)
+        if value is None:
+            return
+        self.column[row] = value
+        bucket = self.buckets.setdefault(value, set())
+        if not bucket:
+            self._keys = None
+        bucket.add(row)
+    
+    def supports(self, op: str) -> bool:
+        return op in ('eq', 'in') or (self.kind == 'sorted' and op in ('lt', 'le', 'gt', 'ge'))
+    
+    def lookup(self, op: str, value: Any) -> Set[int]:
+        """Rows whose value satisfies the predicate"""
+        kind = COMPARISON_KINDS[self.dtype]
+        if op == 'in':
+            return set().union(*(self.buckets.get(v, ()) for v in value if _kind(v) is kind))
+        if _kind(value) is not kind:
+            return set()
+        if op == 'eq':
+            return set(self.buckets.get(value, ()))
+        if self._keys is None:
+            self._keys = sorted(key for key, rows in self.buckets.items() if rows)
+        keys = self._keys
+        if op in ('lt', 'le'):
+            keys = keys[:(bisect.bisect_left if op == 'lt' else bisect.bisect_right)(keys, value)]
+        else:
+            keys = keys[(bisect.bisect_right if op == 'gt' else bisect.bisect_left)(keys, value):]
+        return set().union(*(self.buckets[key] for key in keys))
+
+def _find_rows(predicates: Dict[str, Any], indexes: Dict[str, AttributeIndex],
+               attrs: List[Dict[str, Any]]) -> List[int]:
+    """Rows matching every predicate, narrowed by indexes and then scanned"""
+    rows: Optional[Set[int]] = None
+    remaining = []
+    for attribute, op, value in parse_predicates(predicates):
+        index = indexes.get(attribute)
+        if index is not None and index.supports(op):
+            hits = index.lookup(op, value)
+            rows = hits if rows is None else rows & hits
+        elif index is not None:
+            remaining.append((attribute, op, value, index))
+        else:
+            remaining.append((attribute, op, value, None))
+    candidates = range(len(attrs)) if rows is None else sorted(rows)
+    # Indexed attributes are compared on their typed column, keyed by row
+    return [row for row in candidates
+            if all(_matches(index.column, row, op, value) if index
+                   else _matches(attrs[row], attribute, op, value)
+                   for attribute, op, value, index in remaining)]
 
 class HyperGraphBackend(ABC):
     """Abstract base class for hypergraph backends"""
     
+    # Whether the backend keeps its data across process restarts
+    persistent = False
+    
     @abstractmethod
     def add_vertex(self, vertex_id: str, **attrs) -> None:
         pass
@@ -31,183 +223,1456 @@ class HyperGraphBackend(ABC):
     @abstractmethod
     def get_neighbors(self, vertex_id: str) -> Set[str]:
         pass
+    
+    def add_vertices(self, vertices: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """Add many vertices at once; backends override to flush in one shot"""
+        for vertex_id, attrs in vertices:
+            self.add_vertex(vertex_id, **attrs)
+    
+    def add_edges(self, edges: List[HyperEdge]) -> None:
+        """Add many hyperedges at once; backends override to flush in one shot"""
+        for edge in edges:
+            self.add_edge(edge)
+    
+    def create_index(self, attribute: str, dtype: str = 'str', kind: str = 'hash',
+                     target: str = 'vertex') -> None:
+        """Declare an attribute index; backends that cannot filter on attributes ignore it"""
 
 class NetworkXBackend(HyperGraphBackend):
-    """NetworkX-based implementation"""
+    """NetworkX-based implementation
     
-    def __init__(self):
+    Hyperedges are stored as bipartite vertex-edge incidences, keyed by
+    ("edge", edge.id) nodes. Pass clique=True for the binary clique
+    expansion instead.
+    """
+    
+    def __init__(self, clique: bool = False):
         self.graph = nx.Graph()
+        self.clique = clique
         
     def add_vertex(self, vertex_id: str, **attrs):
         self.graph.add_node(vertex_id, **attrs)
         
     def add_edge(self, edge: HyperEdge):
-        # Convert hyperedge to clique
-        vertices = list(edge.vertices)
-        for i in range(len(vertices)):
-            for j in range(i + 1, len(vertices)):
-                self.graph.add_edge(vertices[i], vertices[j], 
-                                  **edge.attributes)
+        if self.clique:
+            # Convert hyperedge to clique
+            for u, v in _clique_pairs(edge.vertices):
+                self.graph.add_edge(u, v, **edge.attributes)
+        else:
+            node = ("edge", edge.id)
+            self.graph.add_node(node, **edge.attributes)
+            self.graph.add_edges_from((node, v) for v in edge.vertices)
+    
+    def add_vertices(self, vertices: List[Tuple[str, Dict[str, Any]]]):
+        self.graph.add_nodes_from(vertices)
+    
+    def add_edges(self, edges: List[HyperEdge]):
+        if self.clique:
+            self.graph.add_edges_from(
+                (u, v, edge.attributes)
+                for edge in edges
+                for u, v in _clique_pairs(edge.vertices)
+            )
+        else:
+            self.graph.add_nodes_from((("edge", edge.id), edge.attributes)
+                                      for edge in edges)
+            self.graph.add_edges_from((("edge", edge.id), v)
+                                      for edge in edges
+                                      for v in edge.vertices)
                 
     def get_neighbors(self, vertex_id: str) -> Set[str]:
-        return set(self.graph.neighbors(vertex_id))
+        if self.clique:
+            return set(self.graph.neighbors(vertex_id))
+        return {v
+                for node in self.graph.neighbors(vertex_id)
+                for v in self.graph.neighbors(node)
+                if v != vertex_id}
+
+class IncidenceBackend(HyperGraphBackend):
+    """Bipartite vertex-edge incidence store backed by NumPy CSR arrays
+    
+    Memory and insert time are linear in hyperedge size and edge ids are
+    preserved. Use clique_projection() when a binary graph is needed.
+    """
+    
+    def __init__(self):
+        self.vertex_ids: List[str] = []
+        self.vertex_index: Dict[str, int] = {}
+        self.vertex_attrs: List[Dict[str, Any]] = []
+        self.edge_ids: List[str] = []
+        self.edge_index: Dict[str, int] = {}
+        self.edge_attrs: List[Dict[str, Any]] = []
+        # Edge -> vertex CSR grows by appending; vertex -> edge is its
+        # transpose and is rebuilt lazily after mutations
+        self._edge_ptr = array('q', [0])
+        self._edge_members = array('q')
+        self._csr: Optional[Tuple[np.ndarray, ...]] = None
+        self.vertex_indexes: Dict[str, AttributeIndex] = {}
+        self.edge_indexes: Dict[str, AttributeIndex] = {}
+    
+    def _intern(self, vertex_id: str) -> int:
+        idx = self.vertex_index.get(vertex_id)
+        if idx is None:
+            idx = self.vertex_index[vertex_id] = len(self.vertex_ids)
+            self.vertex_ids.append(vertex_id)
+            self.vertex_attrs.append({})
+        return idx
+    
+    def add_vertex(self, vertex_id: str, **attrs):
+        row = self._intern(vertex_id)
+        self.vertex_attrs[row].update(attrs)
+        for index in self.vertex_indexes.values():
+            index.add(row, self.vertex_attrs[row])
+        self._csr = None
+    
+    def add_edge(self, edge: HyperEdge):
+        members = sorted({self._intern(v) for v in edge.vertices})
+        for index in self.edge_indexes.values():
+            index.add(len(self.edge_ids), edge.attributes)
+        self.edge_index[edge.id] = len(self.edge_ids)
+        self.edge_ids.append(edge.id)
+        self.edge_attrs.append(edge.attributes)
+        self._edge_members.extend(members)
+        self._edge_ptr.append(len(self._edge_members))
+        self._csr = None
+    
+    def csr(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Return (edge_ptr, edge_vertices, vertex_ptr, vertex_edges)"""
+        if self._csr is None:
+            edge_ptr = np.array(self._edge_ptr, dtype=np.int64)
+            edge_vertices = np.array(self._edge_members, dtype=np.int64)
+            edge_of = np.repeat(np.arange(len(self.edge_ids)), np.diff(edge_ptr))
+            vertex_edges = edge_of[np.argsort(edge_vertices, kind='stable')]
+            vertex_ptr = np.zeros(len(self.vertex_ids) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(edge_vertices, minlength=len(self.vertex_ids)),
+                      out=vertex_ptr[1:])
+            self._csr = (edge_ptr, edge_vertices, vertex_ptr, vertex_edges)
+        return self._csr
+    
+    def get_edges(self, vertex_id: str) -> List[str]:
+        """Ids of the hyperedges incident to a vertex"""
+        idx = self.vertex_index.get(vertex_id)
+        if idx is None:
+            return []
+        _, _, vertex_ptr, vertex_edges = self.csr()
+        return [self.edge_ids[e]
+                for e in vertex_edges[vertex_ptr[idx]:vertex_ptr[idx + 1]]]
+    
+    def get_edge_vertices(self, edge_id: str) -> List[str]:
+        """Vertices of a hyperedge"""
+        e = self.edge_index[edge_id]
+        members = self._edge_members[self._edge_ptr[e]:self._edge_ptr[e + 1]]
+        return [self.vertex_ids[v] for v in members]
+    
+    def get_neighbors(self, vertex_id: str) -> Set[str]:
+        idx = self.vertex_index.get(vertex_id)
+        if idx is None:
+            return set()
+        edge_ptr, edge_vertices, vertex_ptr, vertex_edges = self.csr()
+        edges = vertex_edges[vertex_ptr[idx]:vertex_ptr[idx + 1]]
+        members = np.unique(_gather(edge_ptr, edge_vertices, edges))
+        return {self.vertex_ids[v] for v in members if v != idx}
+    
+    def create_index(self, attribute: str, dtype: str = 'str', kind: str = 'hash',
+                     target: str = 'vertex'):
+        """Index a vertex or edge attribute, extracting it from existing rows"""
+        if target not in ('vertex', 'edge'):
+            raise ValueError(f"Unknown index target {target!r}, expected 'vertex' or 'edge'")
+        index = AttributeIndex(attribute, dtype, kind)
+        indexes, attrs = ((self.vertex_indexes, self.vertex_attrs) if target == 'vertex'
+                          else (self.edge_indexes, self.edge_attrs))
+        for row, row_attrs in enumerate(attrs):
+            index.add(row, row_attrs)
+        indexes[attribute] = index
+    
+    def find_vertices(self, **predicates) -> Set[str]:
+        """Ids of the vertices matching every attribute predicate (see parse_predicates)"""
+        return {self.vertex_ids[row]
+                for row in _find_rows(predicates, self.vertex_indexes, self.vertex_attrs)}
+    
+    def find_edges(self, **predicates) -> List[HyperEdge]:
+        """Hyperedges matching every attribute predicate (see parse_predicates)"""
+        return [HyperEdge(set(self.get_edge_vertices(self.edge_ids[e])), self.edge_attrs[e],
+                          id=self.edge_ids[e])
+                for e in _find_rows(predicates, self.edge_indexes, self.edge_attrs)]
+    
+    def vertex_items(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """All (vertex_id, attrs) pairs, suitable for add_vertices"""
+        return list(zip(self.vertex_ids, self.vertex_attrs))
+    
+    def hyperedges(self) -> List[HyperEdge]:
+        """All stored hyperedges, suitable for add_edges"""
+        return [HyperEdge(set(self.get_edge_vertices(edge_id)), self.edge_attrs[e], id=edge_id)
+                for e, edge_id in enumerate(self.edge_ids)]
+    
+    def save_snapshot(self, path: str):
+        """Write a snapshot directory: CSR arrays as .npy, ids and attributes as Arrow IPC"""
+        out = Path(path)
+        out.mkdir(parents=True, exist_ok=True)
+        for name, values in zip(SNAPSHOT_ARRAYS, self.csr()):
+            np.save(out / f"{name}.npy", values)
+        _write_arrow(out / "vertices.arrow", {
+            "id": self.vertex_ids,
+            "attrs": [dump_attrs(attrs) for attrs in self.vertex_attrs],
+        })
+        _write_arrow(out / "edges.arrow", {
+            "id": self.edge_ids,
+            "attrs": [dump_attrs(attrs) for attrs in self.edge_attrs],
+        })
+        (out / "manifest.json").write_text(json.dumps({
+            "format": SNAPSHOT_FORMAT,
+            "vertices": len(self.vertex_ids),
+            "edges": len(self.edge_ids),
+            "incidences": len(self._edge_members),
+        }))
+    
+    @classmethod
+    def load_snapshot(cls, path: str, attributes: bool = True) -> "IncidenceBackend":
+        """Restore a backend from save_snapshot output
+        
+        The CSR arrays are memory-mapped and used as-is until the next
+        mutation; pass attributes=False to skip decoding attribute dicts.
+        """
+        src = Path(path)
+        manifest = json.loads((src / "manifest.json").read_text())
+        if manifest.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"Unsupported snapshot format {manifest.get('format')!r}")
+        arrays = tuple(np.load(src / f"{name}.npy", mmap_mode='r')
+                       for name in SNAPSHOT_ARRAYS)
+        vertices = _read_arrow(src / "vertices.arrow")
+        edges = _read_arrow(src / "edges.arrow")
+        
+        backend = cls()
+        backend.vertex_ids = vertices.column("id").to_pylist()
+        backend.vertex_index = {v: i for i, v in enumerate(backend.vertex_ids)}
+        backend.edge_ids = edges.column("id").to_pylist()
+        backend.edge_index = {e: i for i, e in enumerate(backend.edge_ids)}
+        if attributes:
+            backend.vertex_attrs = [load_attrs(a) for a in vertices.column("attrs").to_pylist()]
+            backend.edge_attrs = [load_attrs(a) for a in edges.column("attrs").to_pylist()]
+        else:
+            backend.vertex_attrs = [{} for _ in backend.vertex_ids]
+            backend.edge_attrs = [{} for _ in backend.edge_ids]
+        backend._edge_ptr = array('q', np.asarray(arrays[0], dtype=np.int64).tobytes())
+        backend._edge_members = array('q', np.asarray(arrays[1], dtype=np.int64).tobytes())
+        backend._csr = arrays
+        return backend
+    
+    def clique_projection(self) -> nx.Graph:
+        """Opt-in clique expansion of the stored hyperedges"""
+        graph = nx.Graph()
+        graph.add_nodes_from(zip(self.vertex_ids, self.vertex_attrs))
+        for e, edge_id in enumerate(self.edge_ids):
+            graph.add_edges_from(_clique_pairs(self.get_edge_vertices(edge_id)),
+                                 **self.edge_attrs[e])
+        return graph
 
 class DisCoPyBackend(HyperGraphBackend):
-    """DisCoPy categorical implementation"""
+    """DisCoPy categorical implementation
+    
+    Boxes are kept in an append-only list and only tensored into a
+    Diagram when the diagram attribute is read; the result is cached
+    until the next mutation.
+    """
     
     def __init__(self):
-        self.diagram = dc.Diagram.id(dc.Ty())
+        self.boxes: List[Box] = []
         self.vertices = {}
+        # vertex id -> vertex lists of the edge boxes it appears in
+        self.vertex_edges: Dict[str, List[List[str]]] = {}
+        self._diagram = None
+    
+    @property
+    def diagram(self):
+        if self._diagram is None:
+            self._diagram = _tensor_all(self.boxes)
+        return self._diagram
         
     def add_vertex(self, vertex_id: str, **attrs):
-        ty = dc.Ty(vertex_id)
+        ty = Ty(vertex_id)
         self.vertices[vertex_id] = ty
-        self.diagram = self.diagram @ dc.Box(vertex_id, dc.Ty(), ty)
+        self.boxes.append(Box(vertex_id, Ty(), ty))
+        self._diagram = None
         
     def add_edge(self, edge: HyperEdge):
         # Create morphism between vertices
-        dom = dc.Ty().tensor(*[self.vertices[v] for v in edge.vertices])
-        cod = dc.Ty()
-        self.diagram = self.diagram @ dc.Box(str(edge.attributes), dom, cod)
+        vertices = list(edge.vertices)
+        dom = Ty().tensor(*[self.vertices[v] for v in vertices])
+        cod = Ty()
+        self.boxes.append(Box(str(edge.attributes), dom, cod))
+        for v in vertices:
+            self.vertex_edges.setdefault(v, []).append(vertices)
+        self._diagram = None
         
     def get_neighbors(self, vertex_id: str) -> Set[str]:
-        # Get connected vertices through diagram composition
-        connected = set()
-        for box in self.diagram.boxes:
-            if vertex_id in str(box.dom):
-                for ty in box.dom:
-                    if str(ty) != vertex_id:
-                        connected.add(str(ty))
-        return connected
+        # Get connected vertices through the edge boxes on this vertex
+        return {v
+                for vertices in self.vertex_edges.get(vertex_id, ())
+                for v in vertices
+                if v != vertex_id}
+
+def _tensor_all(boxes: List[Box]):
+    """Tensor boxes pairwise in a balanced tree, O(n log n) rather than O(n^2)"""
+    layer = list(boxes) or [Diagram.id(Ty())]
+    while len(layer) > 1:
+        layer = [layer[i] @ layer[i + 1] if i + 1 < len(layer) else layer[i]
+                 for i in range(0, len(layer), 2)]
+    return layer[0]
+
+class AdjacencyIndex(IncidenceBackend):
+    """Sparse incidence index answering batched neighbor and k-hop queries
+    
+    Queries are sparse products with the edge x vertex incidence matrix B,
+    so a hyperedge of size k costs O(k) rather than the O(k^2) of a
+    materialized adjacency matrix.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        # The csr() tuple the matrices were built from, then B and its transpose
+        self._matrices: Optional[Tuple[Tuple[np.ndarray, ...], sp.csr_matrix, sp.csr_matrix]] = None
+    
+    def add_vertex(self, vertex_id: str, **attrs):
+        # Only the vertex id is indexed; attributes live in the backends
+        self._intern(vertex_id)
+        self._csr = None
+    
+    def create_index(self, attribute: str, dtype: str = 'str', kind: str = 'hash',
+                     target: str = 'vertex'):
+        # Attributes are not kept here, so there is nothing to index
+        pass
+    
+    def matrices(self) -> Tuple[sp.csr_matrix, sp.csr_matrix]:
+        """Return the edge x vertex incidence matrix B and its transpose"""
+        # Any mutation replaces the csr() tuple, whoever rebuilt it since
+        csr = self.csr()
+        if self._matrices is None or self._matrices[0] is not csr:
+            edge_ptr, edge_vertices, vertex_ptr, vertex_edges = csr
+            shape = (len(self.edge_ids), len(self.vertex_ids))
+            incidence = sp.csr_matrix(
+                (np.ones(len(edge_vertices), dtype=np.int32), edge_vertices, edge_ptr),
+                shape=shape)
+            transpose = sp.csr_matrix(
+                (np.ones(len(vertex_edges), dtype=np.int32), vertex_edges, vertex_ptr),
+                shape=shape[::-1])
+            self._matrices = (csr, incidence, transpose)
+        return self._matrices[1:]
+    
+    def _rows(self, vertex_ids: Iterable[str]) -> np.ndarray:
+        return np.fromiter((self.vertex_index[v] for v in vertex_ids
+                            if v in self.vertex_index), dtype=np.int64)
+    
+    def neighbors_many(self, vertex_ids: Iterable[str]) -> Dict[str, Set[str]]:
+        """Neighbors of each vertex, computed as one sparse product"""
+        vertex_ids = list(vertex_ids)
+        result = {v: set() for v in vertex_ids}
+        rows = self._rows(vertex_ids)
+        if len(rows) == 0:
+            return result
+        incidence, transpose = self.matrices()
+        reach = (transpose[rows] @ incidence).tocsr()
+        for i, row in enumerate(rows):
+            cols = reach.indices[reach.indptr[i]:reach.indptr[i + 1]]
+            result[self.vertex_ids[row]] = {self.vertex_ids[c] for c in cols if c != row}
+        return result
+    
+    def k_hop(self, vertex_ids: Iterable[str], k: int) -> Set[str]:
+        """Vertices within k hops of any seed vertex, excluding the seeds"""
+        rows = self._rows(vertex_ids)
+        incidence, transpose = self.matrices()
+        visited = np.zeros(len(self.vertex_ids), dtype=bool)
+        visited[rows] = True
+        frontier = visited.astype(np.int32)
+        for _ in range(k):
+            if not frontier.any():
+                break
+            reached = (transpose @ (incidence @ frontier)) > 0
+            reached &= ~visited
+            visited |= reached
+            frontier = reached.astype(np.int32)
+        visited[rows] = False
+        return {self.vertex_ids[v] for v in np.flatnonzero(visited)}
 
 class KuzuBackend(HyperGraphBackend):
-    """Kuzu graph database backend"""
+    """Kuzu graph database backend
+    
+    Hyperedges are stored as hyperedges nodes joined to their vertices by
+    incidence relationships. Pass clique=True to also write the binary
+    clique expansion into the edges relationship table and query it.
     
-    def __init__(self, db_path: str):
+    Bulk writes are staged as Parquet files and loaded with COPY FROM.
+    Multi-hop queries are single variable-length MATCH statements, so the
+    recursion runs inside Kuzu.
+    """
+    
+    persistent = True
+    
+    def __init__(self, db_path: str, clique: bool = False):
         self.db = kuzu.Database(db_path)
-        self.session = self.db.create_session()
+        self.con = kuzu.Connection(self.db)
+        self.clique = clique
         # Create schema
-        self.session.run("CREATE NODE TABLE IF NOT EXISTS vertices(id STRING PRIMARY KEY, data STRING)")
-        self.session.run("CREATE REL TABLE IF NOT EXISTS edges(FROM vertices TO vertices, data STRING)")
+        self._run("CREATE NODE TABLE IF NOT EXISTS vertices(id STRING PRIMARY KEY, data STRING)")
+        self._run("CREATE NODE TABLE IF NOT EXISTS hyperedges(id STRING PRIMARY KEY, data STRING)")
+        self._run("CREATE REL TABLE IF NOT EXISTS incidence(FROM vertices TO hyperedges)")
+        self._run("CREATE REL TABLE IF NOT EXISTS edges(FROM vertices TO vertices, data STRING)")
+    
+    def _run(self, query: str, **params) -> kuzu.QueryResult:
+        return self.con.execute(query, parameters=params)
+    
+    def _existing(self, table: str, ids: List[str]) -> Set[str]:
+        """The given ids already stored in a node table"""
+        result = self._run(f"MATCH (n:{table}) WHERE n.id IN $ids RETURN n.id", ids=ids)
+        return {row[0] for row in result}
         
     def add_vertex(self, vertex_id: str, **attrs):
-        self.session.run("INSERT INTO vertices VALUES ($1, $2)", 
-                        [vertex_id, str(attrs)])
+        self._run("MERGE (v:vertices {id: $id}) SET v.data = $data",
+                  id=vertex_id, data=str(attrs))
         
     def add_edge(self, edge: HyperEdge):
-        # Convert hyperedge to multiple binary edges
-        vertices = list(edge.vertices)
-        for i in range(len(vertices)):
-            for j in range(i + 1, len(vertices)):
-                self.session.run("INSERT INTO edges VALUES ($1, $2, $3)",
-                               [vertices[i], vertices[j], str(edge.attributes)])
+        # Replayed writes find the hyperedge already stored
+        if self._existing("hyperedges", [edge.id]):
+            return
+        self._run("CREATE (h:hyperedges {id: $id, data: $data}) WITH h "
+                  "UNWIND $vertices AS vid "
+                  "MERGE (v:vertices {id: vid}) ON CREATE SET v.data = '{}' "
+                  "CREATE (v)-[:incidence]->(h)",
+                  id=edge.id, data=str(edge.attributes), vertices=list(edge.vertices))
+        if self.clique:
+            # Convert hyperedge to multiple binary edges
+            self._add_clique_edges([edge])
+    
+    def _add_clique_edges(self, edges: List[HyperEdge]):
+        pairs = [[u, v, str(edge.attributes)]
+                 for edge in edges
+                 for u, v in _clique_pairs(edge.vertices)]
+        if pairs:
+            self._run("UNWIND $pairs AS p "
+                      "MATCH (a:vertices {id: p[1]}), (b:vertices {id: p[2]}) "
+                      "CREATE (a)-[:edges {data: p[3]}]->(b)", pairs=pairs)
+    
+    def add_vertices(self, vertices: List[Tuple[str, Dict[str, Any]]]):
+        # COPY FROM rejects duplicate keys, so later attributes win in the
+        # batch and vertices already stored are updated in place
+        data = {vertex_id: str(attrs) for vertex_id, attrs in vertices}
+        existing = self._existing("vertices", list(data))
+        if existing:
+            self._run("UNWIND $rows AS r MERGE (v:vertices {id: r[1]}) SET v.data = r[2]",
+                      rows=[[vertex_id, data[vertex_id]] for vertex_id in sorted(existing)])
+        new = [vertex_id for vertex_id in data if vertex_id not in existing]
+        self._copy_from("vertices", {
+            "id": new,
+            "data": [data[vertex_id] for vertex_id in new],
+        })
+    
+    def add_edges(self, edges: List[HyperEdge]):
+        edges = list({edge.id: edge for edge in edges}.values())
+        existing = self._existing("hyperedges", [edge.id for edge in edges])
+        edges = [edge for edge in edges if edge.id not in existing]
+        members = list(dict.fromkeys(v for edge in edges for v in edge.vertices))
+        stored = self._existing("vertices", members)
+        missing = [v for v in members if v not in stored]
+        self._copy_from("vertices", {"id": missing, "data": ["{}"] * len(missing)})
+        self._copy_from("hyperedges", {
+            "id": [edge.id for edge in edges],
+            "data": [str(edge.attributes) for edge in edges],
+        })
+        self._copy_from("incidence", {
+            "from": [v for edge in edges for v in edge.vertices],
+            "to": [edge.id for edge in edges for _ in edge.vertices],
+        })
+        if self.clique:
+            pairs = [(u, v, str(edge.attributes))
+                     for edge in edges
+                     for u, v in _clique_pairs(edge.vertices)]
+            self._copy_from("edges", {
+                "from": [u for u, _, _ in pairs],
+                "to": [v for _, v, _ in pairs],
+                "data": [data for _, _, data in pairs],
+            })
+    
+    def _copy_from(self, table: str, columns: Dict[str, List[str]]):
+        """Bulk load columns into a table via a staging Parquet file and COPY FROM"""
+        batch = pa.table({name: pa.array(values, pa.string()) for name, values in columns.items()})
+        if batch.num_rows == 0:
+            return
+        fd, path = tempfile.mkstemp(suffix=".parquet", prefix=f"kuzu_{table}_")
+        os.close(fd)
+        try:
+            pq.write_table(batch, path)
+            self._run(f"COPY {table} FROM '{path}'")
+        finally:
+            os.unlink(path)
                 
     def get_neighbors(self, vertex_id: str) -> Set[str]:
-        result = self.session.run("MATCH (v1:vertices)-[e:edges]-(v2:vertices) WHERE v1.id = $1 RETURN v2.id",
-                                [vertex_id])
+        if self.clique:
+            result = self._run("MATCH (v1:vertices)-[e:edges]-(v2:vertices) WHERE v1.id = $id RETURN v2.id",
+                               id=vertex_id)
+        else:
+            result = self._run("MATCH (v1:vertices)-[:incidence]->(:hyperedges)<-[:incidence]-(v2:vertices) "
+                               "WHERE v1.id = $id AND v2.id <> $id RETURN DISTINCT v2.id",
+                               id=vertex_id)
+        return {row[0] for row in result}
+    
+    def _hops(self, max_hops: int) -> str:
+        """Variable-length relationship pattern covering 1..max_hops vertex hops"""
+        max_hops = int(max_hops)
+        if max_hops < 1:
+            raise ValueError("max_hops must be at least 1")
+        if self.clique:
+            return f"[:edges* {{semantics}} 1..{max_hops}]"
+        # Each vertex-to-vertex hop crosses a hyperedge node
+        return f"[:incidence* {{semantics}} 1..{2 * max_hops}]"
+    
+    def reachable(self, src: str, k: int) -> Set[str]:
+        """Vertices reachable from src within k hops, excluding src"""
+        return self.k_hop([src], k)
+    
+    def k_hop(self, vertex_ids: Iterable[str], k: int) -> Set[str]:
+        """Vertices within k hops of any seed vertex, excluding the seeds"""
+        if k < 1:
+            return set()
+        pattern = self._hops(k).format(semantics="SHORTEST")
+        result = self._run(f"MATCH (a:vertices)-{pattern}-(b:vertices) "
+                           "WHERE list_contains($ids, a.id) AND NOT list_contains($ids, b.id) "
+                           "RETURN DISTINCT b.id",
+                           ids=list(vertex_ids))
         return {row[0] for row in result}
+    
+    def paths(self, src: str, dst: str, max_hops: int) -> List[List[str]]:
+        """All trails from src to dst of at most max_hops vertex hops
+        
+        Each path lists node ids in order; without clique expansion vertex
+        ids alternate with the ids of the hyperedges that link them.
+        """
+        pattern = self._hops(max_hops).format(semantics="TRAIL")
+        result = self._run(f"MATCH p = (a:vertices)-{pattern}-(b:vertices) "
+                           "WHERE a.id = $src AND b.id = $dst "
+                           "RETURN properties(nodes(p), 'id')",
+                           src=src, dst=dst)
+        return [row[0] for row in result]
+
+GEOMETRY_COLUMNS = ["wkb", "minx", "miny", "maxx", "maxy"]
+
+# Column types for indexed attributes, and the JSON value types they accept
+DUCKDB_TYPES = {str: 'VARCHAR', int: 'BIGINT', float: 'DOUBLE', bool: 'BOOLEAN'}
+JSON_TYPES = {str: ('VARCHAR',), int: ('BIGINT', 'UBIGINT'),
+              float: ('DOUBLE', 'BIGINT', 'UBIGINT'), bool: ('BOOLEAN',)}
+SQL_OPS = {'eq': '=', 'ne': '<>', 'lt': '<', 'le': '<=', 'gt': '>', 'ge': '>='}
+INDEX_TABLES = {'vertex': 'vertices', 'edge': 'edges'}
+
+def _geometry_row(geometry: Optional[geom.base.BaseGeometry]) -> List[Any]:
+    """WKB and bounding box column values for a geometry (all None if absent)"""
+    if geometry is None:
+        return [None] * len(GEOMETRY_COLUMNS)
+    return [shapely.to_wkb(geometry), *geometry.bounds]
+
+class SpatialIndex:
+    """In-process STRtree over stored geometries
+    
+    The tree gives bounding-box candidates; the exact predicate is then
+    evaluated by GEOS. Keys and data are kept alongside so queries need no
+    further database round trips.
+    """
+    
+    PREDICATES = ('intersects', 'contains', 'within', 'covers', 'covered_by',
+                  'touches', 'overlaps', 'crosses')
+    
+    def __init__(self, rows: List[Tuple[str, Dict, bytes]]):
+        self.keys = [row[0] for row in rows]
+        self.data = [row[1] for row in rows]
+        self.geometries = shapely.from_wkb([row[2] for row in rows])
+        self.tree = STRtree(self.geometries)
+    
+    def _check(self, predicate: str):
+        if predicate not in self.PREDICATES:
+            raise ValueError(f"Unsupported predicate {predicate!r}, expected one of {self.PREDICATES}")
+    
+    def query(self, geometry: geom.base.BaseGeometry, predicate: str = 'intersects'
+              ) -> List[Tuple[str, Dict]]:
+        """Entries whose geometry satisfies predicate(query, entry)"""
+        self._check(predicate)
+        hits = np.sort(self.tree.query(geometry, predicate=predicate))
+        return [(self.keys[i], self.data[i]) for i in hits]
+    
+    def query_many(self, geometries: List[geom.base.BaseGeometry],
+                   predicate: str = 'intersects') -> List[List[Tuple[str, Dict]]]:
+        """Run query for many geometries in one vectorized tree probe"""
+        self._check(predicate)
+        results: List[List[Tuple[str, Dict]]] = [[] for _ in geometries]
+        if len(geometries) == 0:
+            return results
+        inputs, hits = self.tree.query(np.asarray(geometries, dtype=object),
+                                       predicate=predicate)
+        for g, i in sorted(zip(inputs.tolist(), hits.tolist())):
+            results[g].append((self.keys[i], self.data[i]))
+        return results
+    
+    def nearest(self, geometry: geom.base.BaseGeometry, k: int = 1
+                ) -> List[Tuple[str, Dict, float]]:
+        """The k entries closest to geometry, with their distances"""
+        if k <= 0 or not self.keys:
+            return []
+        _, distances = self.tree.query_nearest(geometry, return_distance=True)
+        # Widen a distance window from the nearest hit until it holds k entries
+        radius = max(float(distances.max()), 1e-6)
+        while True:
+            candidates = self.tree.query(geometry, predicate='dwithin', distance=radius)
+            if len(candidates) >= k or len(candidates) == len(self.keys):
+                break
+            radius *= 4
+        distances = shapely.distance(self.geometries[candidates], geometry)
+        order = np.lexsort((candidates, distances))[:k]
+        return [(self.keys[candidates[i]], self.data[candidates[i]], float(distances[i]))
+                for i in order]
 
 class DuckDBBackend(HyperGraphBackend):
-    """DuckDB spatial-enabled backend"""
+    """DuckDB spatial-enabled backend
+    
+    Geometries are stored as WKB with bounding-box columns and queried
+    through a SpatialIndex that is rebuilt lazily after writes.
+    
+    Hyperedge membership lives in a normalized incidence table, the same
+    shape as duck_ops.create_hypergraph_tables, with ART indexes on both
+    vertex_id and edge_id. Edge ids come from the edge_ids sequence; the
+    HyperEdge id is kept in a unique uid column.
+    
+    Writes are idempotent, so a mutation log can replay them: re-adding a
+    vertex merges its attributes like dict.update and re-adding an edge is
+    a no-op.
+    
+    Writes go through one connection guarded by a lock; reads borrow one of
+    `readers` cursors from a pool so they can run in parallel with the
+    writer. SQL text is parsed once and the statement reused.
     
-    def __init__(self, db_path: str):
+    Declared attribute indexes add a typed attr_<name> column, filled from
+    the attribute dict at insert time, with an ART index on it. Declarations
+    are kept in the attribute_indexes table.
+    """
+    
+    persistent = True
+    
+    def __init__(self, db_path: str, readers: int = 4):
         self.con = duckdb.connect(db_path)
-        # Create tables with spatial support using WKT
+        self._spatial: Optional[SpatialIndex] = None
+        self._statements: Dict[str, Any] = {}
+        self._write_lock = threading.Lock()
+        self._readers: queue.LifoQueue = queue.LifoQueue()
+        for _ in range(readers):
+            self._readers.put(self.con.cursor())
+        # Create tables with spatial support using WKB plus bounding boxes
         self.con.execute("""
             CREATE TABLE IF NOT EXISTS vertices (
                 id VARCHAR PRIMARY KEY,
                 data JSON,
-                geom VARCHAR  -- Store as WKT
+                wkb BLOB,
+                minx DOUBLE, miny DOUBLE, maxx DOUBLE, maxy DOUBLE
             )
         """)
+        self.con.execute("CREATE SEQUENCE IF NOT EXISTS edge_ids START 1")
         self.con.execute("""
             CREATE TABLE IF NOT EXISTS edges (
-                id INTEGER PRIMARY KEY,
-                vertices JSON,
+                id INTEGER PRIMARY KEY DEFAULT nextval('edge_ids'),
+                uid VARCHAR,  -- HyperEdge.id
                 data JSON,
-                geom VARCHAR  -- Store as WKT
+                wkb BLOB,
+                minx DOUBLE, miny DOUBLE, maxx DOUBLE, maxy DOUBLE
+            )
+        """)
+        self.con.execute("""
+            CREATE TABLE IF NOT EXISTS incidence (
+                edge_id INTEGER,
+                vertex_id VARCHAR,
+                role VARCHAR,
+                ordering INTEGER,
+                PRIMARY KEY (edge_id, vertex_id, role)
             )
         """)
+        self.con.execute("CREATE INDEX IF NOT EXISTS incidence_vertex_idx ON incidence(vertex_id)")
+        self.con.execute("CREATE INDEX IF NOT EXISTS incidence_edge_idx ON incidence(edge_id)")
+        self.con.execute("""
+            CREATE TABLE IF NOT EXISTS attribute_indexes (
+                target VARCHAR,
+                attribute VARCHAR,
+                dtype VARCHAR,
+                kind VARCHAR,
+                PRIMARY KEY (target, attribute)
+            )
+        """)
+        self._migrate()
+        self.con.execute("CREATE UNIQUE INDEX IF NOT EXISTS edges_uid_idx ON edges(uid)")
+        # target -> attribute -> declared type of its attr_ column
+        self._indexes: Dict[str, Dict[str, type]] = {'vertex': {}, 'edge': {}}
+        for target, attribute, dtype in self.con.execute(
+                "SELECT target, attribute, dtype FROM attribute_indexes").fetchall():
+            self._indexes[target][attribute] = INDEX_DTYPES[dtype]
+        
+    def _migrate(self):
+        """Upgrade tables written by earlier versions of this backend"""
+        columns: Dict[str, Set[str]] = {}
+        for table, column in self.con.execute("""
+                SELECT table_name, column_name FROM duckdb_columns()
+                WHERE database_name = current_database() AND schema_name = 'main'
+            """).fetchall():
+            columns.setdefault(table, set()).add(column)
+        # Geometries used to be stored as WKT in a geom column
+        for table in ('vertices', 'edges'):
+            if 'geom' not in columns[table]:
+                continue
+            with self._transaction() as con:
+                for column in GEOMETRY_COLUMNS:
+                    con.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} "
+                                f"{'BLOB' if column == 'wkb' else 'DOUBLE'}")
+                rows = con.execute(f"SELECT id, geom FROM {table} WHERE geom IS NOT NULL").fetchall()
+                if rows:
+                    self._update_rows(table, "id", [
+                        [key, *_geometry_row(shapely.from_wkt(wkt))] for key, wkt in rows
+                    ], GEOMETRY_COLUMNS)
+            # DuckDB cannot drop a column in the transaction that updated the table
+            with self._transaction() as con:
+                con.execute(f"ALTER TABLE {table} DROP COLUMN geom")
+        # Hyperedge members used to be a JSON list on edges, whose id had no default
+        if 'vertices' in columns['edges']:
+            with self._transaction() as con:
+                con.execute("""
+                    INSERT OR IGNORE INTO incidence (edge_id, vertex_id, role, ordering)
+                    SELECT id, unnest(vertices::VARCHAR[]), 'member',
+                           generate_subscripts(vertices::VARCHAR[], 1)
+                    FROM edges WHERE vertices IS NOT NULL
+                """)
+                start = con.execute("SELECT coalesce(max(id), 0) + 1 FROM edges").fetchone()[0]
+                con.execute(f"CREATE OR REPLACE SEQUENCE edge_ids START {start}")
+                con.execute("ALTER TABLE edges ALTER COLUMN id SET DEFAULT nextval('edge_ids')")
+                con.execute("ALTER TABLE edges DROP COLUMN vertices")
+        # Edges stored before uid was added are keyed by their sequence id
+        if 'uid' not in columns['edges']:
+            with self._transaction() as con:
+                con.execute("ALTER TABLE edges ADD COLUMN uid VARCHAR")
+                con.execute("UPDATE edges SET uid = CAST(id AS VARCHAR)")
+
+    def _update_rows(self, table: str, key: str, rows: List[List[Any]], columns: List[str]):
+        """Set columns of existing rows from [key, *values] lists
+        
+        The caller must hold the write lock (see _transaction).
+        """
+        self.con.register("_updates", pa.table({
+            col: [row[i] for row in rows] for i, col in enumerate([key, *columns])
+        }))
+        try:
+            self.con.execute(f"""
+                UPDATE {table} SET {", ".join(f"{col} = u.{col}" for col in columns)}
+                FROM _updates u WHERE {table}.{key} = u.{key}
+            """)
+        finally:
+            self.con.unregister("_updates")
+    
+    def _statement(self, sql: str):
+        """Parse SQL once and cache the statement for reuse on any cursor"""
+        statement = self._statements.get(sql)
+        if statement is None:
+            statement = self._statements[sql] = self.con.extract_statements(sql)[0]
+        return statement
+    
+    @contextmanager
+    def _transaction(self):
+        """Hold the write lock for one transaction on the writer connection"""
+        with self._write_lock:
+            self.con.begin()
+            try:
+                yield self.con
+            except BaseException:
+                self.con.rollback()
+                raise
+            self.con.commit()
+        self._spatial = None
+    
+    def _write(self, sql: str, params: List[Any]):
+        with self._transaction() as con:
+            return con.execute(self._statement(sql), params).fetchall()
+    
+    @contextmanager
+    def _reader(self):
+        """Borrow a cursor from the reader pool"""
+        cursor = self._readers.get()
+        try:
+            yield cursor
+        finally:
+            self._readers.put(cursor)
+    
+    def _read(self, sql: str, params: Optional[List[Any]] = None) -> List[Tuple]:
+        with self._reader() as cursor:
+            return cursor.execute(self._statement(sql), params or []).fetchall()
+        
+    def _index_columns(self, target: str) -> List[str]:
+        return [f"attr_{attribute}" for attribute in self._indexes[target]]
+    
+    def _index_values(self, target: str, attrs: Dict[str, Any]) -> List[Any]:
+        return [_typed_value(attrs, attribute, dtype)
+                for attribute, dtype in self._indexes[target].items()]
+    
+    def _vertex_columns(self) -> List[str]:
+        return ["id", "data", *GEOMETRY_COLUMNS, *self._index_columns('vertex')]
+    
+    def _vertex_rows(self, con, vertices: Dict[str, Dict[str, Any]]) -> List[List[Any]]:
+        """Full vertices rows with attrs merged into the stored ones like dict.update
         
+        Geometry is kept unless attrs has a geometry key, and indexed columns
+        are recomputed from the merged attributes. The caller must hold the
+        write lock (see _transaction).
+        """
+        stored = {row[0]: row[1:] for row in con.execute(self._statement(f"""
+            SELECT id, data, {", ".join(GEOMETRY_COLUMNS)} FROM vertices
+            WHERE id IN (SELECT unnest(?::VARCHAR[]))
+        """), [list(vertices)]).fetchall()}
+        rows = []
+        for vertex_id, attrs in vertices.items():
+            attrs = dict(attrs)
+            old = stored.get(vertex_id)
+            data = json.loads(old[0]) if old else {}
+            if 'geometry' in attrs:
+                geometry = _geometry_row(attrs.pop('geometry'))
+            else:
+                geometry = list(old[1:]) if old else _geometry_row(None)
+            data.update(attrs)
+            rows.append([vertex_id, json.dumps(data), *geometry,
+                         *self._index_values('vertex', data)])
+        return rows
+    
+    def _replace_vertex(self) -> str:
+        """ON CONFLICT clause overwriting a stored vertex with its merged row"""
+        return "ON CONFLICT (id) DO UPDATE SET " + ", ".join(
+            f"{col} = excluded.{col}" for col in self._vertex_columns()[1:])
+    
     def add_vertex(self, vertex_id: str, **attrs):
-        geom = attrs.pop('geometry', None)
-        self.con.execute("""
-            INSERT INTO vertices (id, data, geom)
-            VALUES (?, ?, ?)
-        """, [vertex_id, json.dumps(attrs), str(geom) if geom else None])
+        columns = self._vertex_columns()
+        with self._transaction() as con:
+            con.execute(self._statement(f"""
+                INSERT INTO vertices ({", ".join(columns)})
+                VALUES ({", ".join("?" * len(columns))})
+                {self._replace_vertex()}
+            """), self._vertex_rows(con, {vertex_id: attrs})[0])
         
-    def add_edge(self, edge: HyperEdge):
-        self.con.execute("""
-            INSERT INTO edges (vertices, data, geom)
-            VALUES (?, ?, ?)
-        """, [json.dumps(list(edge.vertices)), json.dumps(edge.attributes), 
-              str(edge.geometry) if edge.geometry else None])
+    def add_edge(self, edge: HyperEdge) -> int:
+        """Insert a hyperedge and its incidences atomically, returning its id
+        
+        An edge whose HyperEdge.id is already stored is left as it is.
+        """
+        vertices = list(edge.vertices)
+        columns = ["uid", "data", *GEOMETRY_COLUMNS, *self._index_columns('edge')]
+        with self._transaction() as con:
+            row = con.execute(self._statement(f"""
+                INSERT INTO edges ({", ".join(columns)})
+                VALUES ({", ".join("?" * len(columns))})
+                ON CONFLICT (uid) DO NOTHING
+                RETURNING id
+            """), [edge.id, json.dumps(edge.attributes), *_geometry_row(edge.geometry),
+                   *self._index_values('edge', edge.attributes)]).fetchone()
+            if row is None:
+                return con.execute(self._statement("SELECT id FROM edges WHERE uid = ?"),
+                                   [edge.id]).fetchone()[0]
+            edge_id = row[0]
+            con.execute(self._statement("""
+                INSERT INTO incidence (edge_id, vertex_id, role, ordering)
+                SELECT ?, unnest(?::VARCHAR[]), 'member', generate_subscripts(?::VARCHAR[], 1)
+            """), [edge_id, vertices, vertices])
+        return edge_id
+    
+    def add_vertices(self, vertices: List[Tuple[str, Dict[str, Any]]]):
+        # One row per id, since a statement cannot update the same row twice
+        merged: Dict[str, Dict[str, Any]] = {}
+        for vertex_id, attrs in vertices:
+            merged.setdefault(vertex_id, {}).update(attrs)
+        with self._transaction() as con:
+            self._insert_batch("vertices", self._vertex_columns(),
+                               self._vertex_rows(con, merged), self._replace_vertex())
+    
+    def add_edges(self, edges: List[HyperEdge]) -> List[int]:
+        """Insert hyperedges and incidences in one transaction, returning their ids
+        
+        Edges whose HyperEdge.id is already stored are skipped.
+        """
+        if not edges:
+            return []
+        with self._transaction() as con:
+            ids = dict(con.execute(self._statement("""
+                SELECT uid, id FROM edges WHERE uid IN (SELECT unnest(?::VARCHAR[]))
+            """), [[edge.id for edge in edges]]).fetchall())
+            new = list({edge.id: edge for edge in edges if edge.id not in ids}.values())
+            new_ids = [row[0] for row in con.execute(self._statement(
+                "SELECT nextval('edge_ids') FROM range(?)"), [len(new)]).fetchall()]
+            self._insert_batch("edges", ["id", "uid", "data", *GEOMETRY_COLUMNS,
+                                         *self._index_columns('edge')],
+                               [[edge_id, edge.id, json.dumps(edge.attributes),
+                                 *_geometry_row(edge.geometry),
+                                 *self._index_values('edge', edge.attributes)]
+                                for edge_id, edge in zip(new_ids, new)])
+            self._insert_batch("incidence", ["edge_id", "vertex_id", "role", "ordering"],
+                               [[edge_id, v, 'member', i]
+                                for edge_id, edge in zip(new_ids, new)
+                                for i, v in enumerate(edge.vertices, 1)])
+            ids.update((edge.id, edge_id) for edge_id, edge in zip(new_ids, new))
+        return [ids[edge.id] for edge in edges]
+    
+    def _insert_batch(self, table: str, columns: List[str], rows: List[List[Any]],
+                      on_conflict: str = ""):
+        """Append rows as an Arrow table with a single INSERT ... SELECT
+        
+        on_conflict is an optional ON CONFLICT clause. The caller must hold
+        the write lock (see _transaction).
+        """
+        if not rows:
+            return
+        batch = pa.table({col: [row[i] for row in rows]
+                          for i, col in enumerate(columns)})
+        cols = ", ".join(columns)
+        self.con.register("_batch", batch)
+        try:
+            self.con.execute(f"INSERT INTO {table} ({cols}) SELECT {cols} FROM _batch {on_conflict}")
+        finally:
+            self.con.unregister("_batch")
         
     def get_neighbors(self, vertex_id: str) -> Set[str]:
-        result = self.con.execute("""
-            SELECT DISTINCT unnest(e.vertices) as neighbor
-            FROM edges e
-            WHERE array_contains(e.vertices, ?)
-            AND unnest(e.vertices) != ?
-        """, [vertex_id, vertex_id]).fetchall()
-        return {row[0] for row in result}
+        # Self-join through both indexes: vertex -> edges -> members
+        return {row[0] for row in self._read("""
+            SELECT DISTINCT i2.vertex_id
+            FROM incidence i1 JOIN incidence i2 USING (edge_id)
+            WHERE i1.vertex_id = ? AND i2.vertex_id <> ?
+        """, [vertex_id, vertex_id])}
+    
+    def get_edge_vertices(self, edge_id: int) -> List[str]:
+        """Vertices of a hyperedge in insertion order"""
+        return [row[0] for row in self._read("""
+            SELECT vertex_id FROM incidence WHERE edge_id = ? ORDER BY ordering
+        """, [edge_id])]
+    
+    def export(self) -> Tuple[List[Tuple[str, Dict[str, Any]]], List[HyperEdge]]:
+        """All vertices and hyperedges, read back as Arrow columns
+        
+        Vertex geometries are restored into the 'geometry' attribute and
+        hyperedges keep their HyperEdge ids.
+        """
+        with self._reader() as cursor:
+            vertex_table = cursor.execute("SELECT id, data, wkb FROM vertices").fetch_arrow_table()
+            edge_table = cursor.execute(self.EDGE_QUERY.format(where="TRUE")).fetch_arrow_table()
+        vertices = []
+        for vertex_id, data, wkb in zip(*(vertex_table.column(c).to_pylist()
+                                          for c in ("id", "data", "wkb"))):
+            attrs = json.loads(data)
+            if wkb is not None:
+                attrs['geometry'] = shapely.from_wkb(wkb)
+            vertices.append((vertex_id, attrs))
+        return vertices, self._hyperedges(edge_table)
+    
+    # Hyperedges with their ordered members, filtered by a WHERE clause on e
+    EDGE_QUERY = """
+        SELECT e.id, e.uid, e.data, e.wkb, list(i.vertex_id ORDER BY i.ordering) AS members
+        FROM edges e JOIN incidence i ON i.edge_id = e.id
+        WHERE {where}
+        GROUP BY e.id, e.uid, e.data, e.wkb
+        ORDER BY e.id
+    """
+    
+    @staticmethod
+    def _hyperedges(table: pa.Table) -> List[HyperEdge]:
+        return [HyperEdge(set(members), json.loads(data),
+                          shapely.from_wkb(wkb) if wkb is not None else None,
+                          id=uid)
+                for uid, data, wkb, members in zip(*(table.column(c).to_pylist()
+                                                     for c in ("uid", "data", "wkb", "members")))]
+    
+    def create_index(self, attribute: str, dtype: str = 'str', kind: str = 'hash',
+                     target: str = 'vertex'):
+        """Add a typed column for an attribute, backfill it and index it
+        
+        Both kinds use an ART index, which serves point and range lookups.
+        """
+        if target not in INDEX_TABLES:
+            raise ValueError(f"Unknown index target {target!r}, expected 'vertex' or 'edge'")
+        if kind not in AttributeIndex.KINDS:
+            raise ValueError(f"Unknown index kind {kind!r}, expected one of {AttributeIndex.KINDS}")
+        if dtype not in INDEX_DTYPES:
+            raise ValueError(f"Unknown index dtype {dtype!r}, expected one of {tuple(INDEX_DTYPES)}")
+        if not attribute.isidentifier():
+            raise ValueError(f"Cannot index attribute {attribute!r}: not an identifier")
+        table, column, dtype = INDEX_TABLES[target], f"attr_{attribute}", INDEX_DTYPES[dtype]
+        json_types = ", ".join(f"'{t}'" for t in JSON_TYPES[dtype])
+        with self._transaction() as con:
+            con.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {DUCKDB_TYPES[dtype]}")
+            con.execute(f"""
+                UPDATE {table} SET {column} = CASE
+                    WHEN json_type(data, $path) IN ({json_types})
+                    THEN CAST(json_extract_string(data, $path) AS {DUCKDB_TYPES[dtype]})
+                END
+            """, {"path": f'$."{attribute}"'})
+        # DuckDB cannot build an index over uncommitted updates
+        with self._transaction() as con:
+            con.execute(f"CREATE INDEX IF NOT EXISTS {table}_{column}_idx ON {table}({column})")
+            con.execute("INSERT OR REPLACE INTO attribute_indexes VALUES (?, ?, ?, ?)",
+                        [target, attribute, dtype.__name__, kind])
+            self._indexes[target][attribute] = dtype
+    
+    def _predicates_sql(self, target: str, predicates: Dict[str, Any],
+                        alias: str = "") -> Tuple[str, List[Any]]:
+        """WHERE clause and parameters for keyword predicates
+        
+        Indexed attributes are compared on their typed column; others are
+        extracted from the JSON data when its JSON type is of the operand's
+        kind. Matching follows COMPARISON_KINDS, as in IncidenceBackend;
+        numbers compare as DOUBLE unless both sides are integers, so values
+        past 2**53 may not compare exactly.
+        """
+        clauses, params = [], []
+        for attribute, op, value in parse_predicates(predicates):
+            dtype = self._indexes[target].get(attribute)
+            # Operands grouped by kind; a typed column only holds its own kind
+            groups: Dict[type, List[Any]] = {}
+            for operand in (value if op == 'in' else [value]):
+                kind = _kind(operand)
+                if kind is not None and (dtype is None or kind is COMPARISON_KINDS[dtype]):
+                    groups.setdefault(kind, []).append(operand)
+            alternatives = []
+            for kind, operands in groups.items():
+                if dtype is not None:
+                    expr, expr_params = f"{alias}attr_{attribute}", []
+                else:
+                    json_types = ", ".join(f"'{t}'" for t in JSON_TYPES[kind])
+                    expr = (f"CASE WHEN json_type({alias}data, ?) IN ({json_types}) "
+                            f"THEN CAST(json_extract_string({alias}data, ?) AS {DUCKDB_TYPES[kind]}) END")
+                    expr_params = [f'$."{attribute}"'] * 2
+                # Cast operands so a float is never rounded to an integer column
+                sql_type = DUCKDB_TYPES[float if any(type(v) is float for v in operands)
+                                        else type(operands[0])]
+                if op == 'in':
+                    alternatives.append(f"list_contains(CAST(? AS {sql_type}[]), {expr})")
+                    params += [operands, *expr_params]
+                else:
+                    alternatives.append(f"{expr} {SQL_OPS[op]} CAST(? AS {sql_type})")
+                    params += [*expr_params, operands[0]]
+            clauses.append(f"({' OR '.join(alternatives)})" if alternatives else "FALSE")
+        return " AND ".join(clauses) or "TRUE", params
+    
+    def find_vertices(self, **predicates) -> Set[str]:
+        """Ids of the vertices matching every attribute predicate (see parse_predicates)"""
+        where, params = self._predicates_sql('vertex', predicates)
+        return {row[0] for row in self._read(f"SELECT id FROM vertices WHERE {where}", params)}
+    
+    def find_edges(self, **predicates) -> List[HyperEdge]:
+        """Hyperedges matching every attribute predicate (see parse_predicates)"""
+        where, params = self._predicates_sql('edge', predicates, alias="e.")
+        with self._reader() as cursor:
+            table = cursor.execute(self._statement(self.EDGE_QUERY.format(where=where)),
+                                   params).fetch_arrow_table()
+        return self._hyperedges(table)
     
     def get_vertex(self, vertex_id: str) -> Optional[Dict]:
         """Get vertex data by ID"""
-        result = self.con.execute("""
+        result = self._read("""
             SELECT data
             FROM vertices
             WHERE id = ?
-        """, [vertex_id]).fetchone()
-        return json.loads(result[0]) if result else None
+        """, [vertex_id])
+        return json.loads(result[0][0]) if result else None
+    
+    def spatial_index(self) -> SpatialIndex:
+        """Return the spatial index, rebuilding it from the tables if stale"""
+        if self._spatial is None:
+            rows = self._read("""
+                SELECT id, data, wkb FROM vertices WHERE wkb IS NOT NULL
+                UNION ALL
+                SELECT uid, data, wkb FROM edges WHERE wkb IS NOT NULL
+            """)
+            self._spatial = SpatialIndex([(key, json.loads(data), wkb)
+                                          for key, data, wkb in rows])
+        return self._spatial
 
-    def spatial_query(self, geom: geom.base.BaseGeometry) -> List[Tuple[str, Dict]]:
-        """Query vertices/edges that intersect with given geometry"""
-        vertices = self.con.execute("""
-            SELECT id, data
-            FROM vertices
-            WHERE geom IS NOT NULL 
-            AND geom = ?
-        """, [str(geom)]).fetchall()
+    def spatial_query(self, geom: geom.base.BaseGeometry,
+                      predicate: str = 'intersects') -> List[Tuple[str, Dict]]:
+        """Query vertices/edges whose geometry satisfies predicate(geom, entry)
         
-        edges = self.con.execute("""
-            SELECT vertices, data
-            FROM edges
-            WHERE geom IS NOT NULL 
-            AND geom = ?
-        """, [str(geom)]).fetchall()
-        
-        return [(v[0], json.loads(v[1])) for v in vertices] + \
-               [(str(e[0]), json.loads(e[1])) for e in edges]
+        predicate is one of SpatialIndex.PREDICATES, e.g. 'intersects',
+        'contains' (geom contains the entry) or 'within'.
+        """
+        return self.spatial_index().query(geom, predicate)
+    
+    def spatial_query_many(self, geoms: List[geom.base.BaseGeometry],
+                           predicate: str = 'intersects') -> List[List[Tuple[str, Dict]]]:
+        """spatial_query for many geometries at once"""
+        return self.spatial_index().query_many(geoms, predicate)
+    
+    def nearest(self, geom: geom.base.BaseGeometry, k: int = 1
+                ) -> List[Tuple[str, Dict, float]]:
+        """The k vertices/edges nearest to geom, with distances"""
+        return self.spatial_index().nearest(geom, k)
+
+BACKEND_NAMES = ('networkx', 'incidence', 'discopy', 'kuzu', 'duckdb')
+
+def make_backend(name: str, kuzu_path: str = 'hypergraph.kuzu',
+                 duckdb_path: str = 'hypergraph.duckdb') -> HyperGraphBackend:
+    """Instantiate a backend by name"""
+    if name == 'networkx':
+        return NetworkXBackend()
+    if name == 'incidence':
+        return IncidenceBackend()
+    if name == 'discopy':
+        return DisCoPyBackend()
+    if name == 'kuzu':
+        return KuzuBackend(kuzu_path)
+    if name == 'duckdb':
+        return DuckDBBackend(duckdb_path)
+    raise ValueError(f"Unknown backend {name!r}, expected one of {BACKEND_NAMES}")
+
+class ReplicaWriter:
+    """Applies writes to one replica backend in order on a background thread
+    
+    The queue holds at most max_backlog pending writes; submitting to a full
+    queue blocks the writer until the replica catches up. applied is the
+    mutation log sequence number of the last write applied without error.
+    """
+    
+    def __init__(self, name: str, backend: HyperGraphBackend, max_backlog: int = 1024):
+        self.name = name
+        self.backend = backend
+        self.errors: List[Exception] = []
+        self.applied = 0
+        self.queue: queue.Queue = queue.Queue(maxsize=max_backlog)
+        self.thread = threading.Thread(target=self._run, name=f"hypergraph-{name}",
+                                       daemon=True)
+        self.thread.start()
+    
+    def submit(self, seq: int, method: str, /, *args, **kwargs):
+        self.queue.put((seq, method, args, kwargs))
+    
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                seq, method, args, kwargs = item
+                getattr(self.backend, method)(*args, **kwargs)
+                # A failed write pins the mark so recover() retries from it
+                if not self.errors:
+                    self.applied = seq
+            except Exception as e:
+                self.errors.append(e)
+            finally:
+                self.queue.task_done()
+    
+    def join(self):
+        """Wait until every submitted write has been applied"""
+        self.queue.join()
+    
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
 
 class HyperGraph:
-    """Main hypergraph interface combining multiple backends"""
+    """Main hypergraph interface combining multiple backends
     
-    def __init__(self):
-        self.backends = {
-            'networkx': NetworkXBackend(),
-            'discopy': DisCoPyBackend(),
-            'kuzu': KuzuBackend('hypergraph.kuzu'),
-            'duckdb': DuckDBBackend('hypergraph.duckdb')
-        }
+    backends selects the active backends, either by name or as a mapping of
+    name to instance; all of BACKEND_NAMES are used by default. When primary
+    is given, writes apply synchronously to the primary only and are queued
+    to the other backends (replicas), each on its own thread with at most
+    replica_backlog pending writes. Replicas are eventually consistent; call
+    flush() to wait for them.
+    
+    With log_path, every write is first appended to a MutationLog and each
+    backend's high-water mark is tracked, so after a crash recover() replays
+    only the suffix each persistent backend is missing.
+    
+    Reads go through a QueryEngine, which routes each query to the cheapest
+    backend able to answer it instead of asking every backend.
+    """
+    
+    def __init__(self, backends: Union[Iterable[str], Dict[str, HyperGraphBackend], None] = None,
+                 primary: Optional[str] = None, replica_backlog: int = 1024,
+                 kuzu_path: str = 'hypergraph.kuzu',
+                 duckdb_path: str = 'hypergraph.duckdb',
+                 log_path: Optional[str] = None):
+        if isinstance(backends, dict):
+            self.backends = dict(backends)
+        else:
+            self.backends = {name: make_backend(name, kuzu_path, duckdb_path)
+                             for name in (backends or BACKEND_NAMES)}
+        if primary is not None and primary not in self.backends:
+            raise ValueError(f"Primary backend {primary!r} is not active")
+        self.primary = primary
+        # Always maintained synchronously, whatever the write policy
+        self.index = AdjacencyIndex()
+        self.replicas: Dict[str, ReplicaWriter] = {}
+        if primary is not None:
+            self.replicas = {name: ReplicaWriter(name, backend, replica_backlog)
+                             for name, backend in self.backends.items()
+                             if name != primary}
+        self._batch_depth = 0
+        self._pending_vertices: List[Tuple[str, Dict[str, Any]]] = []
+        self._pending_edges: List[HyperEdge] = []
+        self.log = MutationLog(log_path) if log_path else None
+        self.query = QueryEngine(self)
+        # (target, attribute) -> (dtype, kind) of declared attribute indexes
+        self._attribute_indexes: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        # Highest log sequence applied to the index and each synchronous backend
+        self.marks: Dict[str, int] = {}
+        if self.log:
+            for name, mark in self._load_marks().items():
+                if name in self.backends and self.backends[name].persistent:
+                    self.marks[name] = mark
+                    if name in self.replicas:
+                        self.replicas[name].applied = mark
         
     def add_vertex(self, vertex_id: str, **attrs):
         """Add vertex to all backends"""
-        for backend in self.backends.values():
-            backend.add_vertex(vertex_id, **attrs)
+        if self._batch_depth:
+            self._pending_vertices.append((vertex_id, attrs))
+            return
+        self._write('add_vertex', vertex_id, **attrs)
             
     def add_edge(self, vertices: Set[str], **attrs):
         """Add hyperedge to all backends"""
         geom = attrs.pop('geometry', None)
         edge = HyperEdge(vertices, attrs, geom)
-        for backend in self.backends.values():
-            backend.add_edge(edge)
+        if self._batch_depth:
+            self._pending_edges.append(edge)
+            return
+        self._write('add_edge', edge)
+    
+    @contextmanager
+    def batch(self):
+        """Buffer mutations and flush them to each backend in one shot on exit.
+        
+        Nested batches flush with the outermost one. If the block raises, the
+        buffered mutations are discarded.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            if self._batch_depth == 1:
+                self._pending_vertices.clear()
+                self._pending_edges.clear()
+            raise
+        else:
+            if self._batch_depth == 1:
+                self._flush_pending()
+        finally:
+            self._batch_depth -= 1
+    
+    def bulk_load(self, vertices: Iterable[Tuple[str, Dict[str, Any]]] = (),
+                  edges: Iterable[Tuple[Set[str], Dict[str, Any]]] = ()):
+        """Load (vertex_id, attrs) and (vertices, attrs) pairs in one batch"""
+        with self.batch():
+            for vertex_id, attrs in vertices:
+                self.add_vertex(vertex_id, **attrs)
+            for edge_vertices, attrs in edges:
+                self.add_edge(edge_vertices, **attrs)
+    
+    def create_index(self, attribute: str, dtype: str = 'str', kind: str = 'hash',
+                     target: str = 'vertex'):
+        """Declare a vertex or edge attribute index on every backend that supports one
+        
+        dtype is a key of INDEX_DTYPES and kind is 'hash' or 'sorted'. The
+        declaration is logged like a write and reapplied to backends restored
+        from a snapshot.
+        """
+        self._attribute_indexes[(target, attribute)] = (dtype, kind)
+        self._write('create_index', attribute, dtype, kind, target)
+    
+    def _flush_pending(self):
+        """Write buffered vertices, then edges, to every backend"""
+        vertices, self._pending_vertices = self._pending_vertices, []
+        edges, self._pending_edges = self._pending_edges, []
+        if vertices:
+            self._write('add_vertices', vertices)
+        if edges:
+            self._write('add_edges', edges)
+    
+    def _write(self, method: str, *args, **kwargs):
+        """Log a write, apply it to the primary (or every backend) and queue it to replicas"""
+        seq = self.log.append(method, *args, **kwargs) if self.log else 0
+        getattr(self.index, method)(*args, **kwargs)
+        if self.primary is None:
+            for name, backend in self.backends.items():
+                getattr(backend, method)(*args, **kwargs)
+                self.marks[name] = seq
+        else:
+            getattr(self.backends[self.primary], method)(*args, **kwargs)
+            self.marks[self.primary] = seq
+            for replica in self.replicas.values():
+                replica.submit(seq, method, *args, **kwargs)
+        if self.log and seq % self.log.sync_every == 0:
+            self._save_marks()
+    
+    def _load_marks(self) -> Dict[str, int]:
+        """Saved marks, clamped to the records that actually reached the log"""
+        return {name: min(mark, self.log.last_seq)
+                for name, mark in self.log.load_marks().items()}
+    
+    def _save_marks(self):
+        """Persist the high-water marks of the persistent backends
+        
+        The log is synced first, so no mark points past a record that could
+        still be lost in a crash.
+        """
+        self.log.sync()
+        marks = self._load_marks()
+        for name, backend in self.backends.items():
+            if backend.persistent:
+                replica = self.replicas.get(name)
+                marks[name] = replica.applied if replica else self.marks.get(name, 0)
+        self.log.save_marks(marks)
+    
+    def recover(self) -> Dict[str, int]:
+        """Replay the mutation log into each backend from its high-water mark
+        
+        Persistent backends resume from their saved mark; the index and the
+        in-memory backends replay the whole log. Call this on a freshly
+        constructed HyperGraph, before any writes. Replay is at-least-once:
+        writes applied after the last saved mark are applied again, which
+        DuckDBBackend absorbs by keying rows on vertex and HyperEdge ids. A
+        record a backend rejects is skipped and recorded in recovery_errors.
+        Returns the number of records replayed per backend.
+        """
+        if self.log is None:
+            raise ValueError("recover() needs a HyperGraph constructed with log_path")
+        self.flush()
+        self.recovery_errors: List[Tuple[str, int, Exception]] = []
+        replayed = {}
+        for name, backend in [('index', self.index), *self.backends.items()]:
+            after = min(self.marks.get(name, 0), self.log.last_seq) if backend.persistent else 0
+            replayed[name] = 0
+            for seq, method, args, kwargs in self.log.replay(after):
+                try:
+                    getattr(backend, method)(*args, **kwargs)
+                except Exception as e:
+                    self.recovery_errors.append((name, seq, e))
+                replayed[name] += 1
+            self.marks[name] = self.log.last_seq
+            if name in self.replicas:
+                self.replicas[name].applied = self.log.last_seq
+        self._save_marks()
+        return replayed
+    
+    def flush(self):
+        """Wait for replicas to apply queued writes, raising the first replica error"""
+        for replica in self.replicas.values():
+            replica.join()
+        if self.log:
+            self.log.sync()
+            self._save_marks()
+        for replica in self.replicas.values():
+            if replica.errors:
+                error, replica.errors = replica.errors[0], []
+                raise RuntimeError(f"Replica {replica.name!r} failed to apply a write") from error
+    
+    def close(self):
+        """Flush, stop the replica threads and close the mutation log"""
+        try:
+            self.flush()
+        finally:
+            for replica in self.replicas.values():
+                replica.close()
+            self.replicas = {}
+            if self.log:
+                self.log.close()
+            
+    def save_snapshot(self, path: str):
+        """Write a memory-mappable snapshot of the incidence backend to a directory"""
+        incidence = self.backends.get('incidence')
+        if not isinstance(incidence, IncidenceBackend):
+            raise ValueError("Snapshots need the 'incidence' backend to be active")
+        self.flush()
+        incidence.save_snapshot(path)
+    
+    def load_snapshot(self, path: str):
+        """Hydrate the in-memory backends and the index from a snapshot
+        
+        Incidence backends adopt the snapshot arrays directly; the other
+        in-memory backends are bulk loaded from it. Persistent backends are
+        left untouched. Call this on a freshly constructed HyperGraph.
+        """
+        self.flush()
+        restored = IncidenceBackend.load_snapshot(path)
+        self.index = AdjacencyIndex.load_snapshot(path, attributes=False)
+        vertices, edges = None, None
+        for name, backend in list(self.backends.items()):
+            if backend.persistent:
+                continue
+            if type(backend) is IncidenceBackend:
+                self._replace_backend(name, restored)
+                continue
+            if vertices is None:
+                vertices, edges = restored.vertex_items(), restored.hyperedges()
+            backend.add_vertices(vertices)
+            backend.add_edges(edges)
+    
+    def hydrate_from_duckdb(self):
+        """Rebuild the in-memory backends and the index from the DuckDB tables
+        
+        Reads the tables once in bulk instead of replaying inserts. Call this
+        on a freshly constructed HyperGraph.
+        """
+        self.flush()
+        vertices, edges = self.backends['duckdb'].export()
+        for backend in [self.index, *self.backends.values()]:
+            if not backend.persistent:
+                backend.add_vertices(vertices)
+                backend.add_edges(edges)
+    
+    def _replace_backend(self, name: str, backend: HyperGraphBackend):
+        self.backends[name] = backend
+        if name in self.replicas:
+            self.replicas[name].backend = backend
+        for (target, attribute), (dtype, kind) in self._attribute_indexes.items():
+            backend.create_index(attribute, dtype, kind, target)
+        self.query.invalidate()
             
-    def get_neighbors(self, vertex_id: str) -> Dict[str, Set[str]]:
-        """Get neighbors from all backends"""
+    def get_neighbors(self, vertex_id: str, backend: Optional[str] = None) -> Set[str]:
+        """Get neighbors from the cheapest backend, or from the named backend"""
+        return self.query.execute('neighbors', (vertex_id,), backend=backend)
+    
+    def neighbors_by_backend(self, vertex_id: str) -> Dict[str, Set[str]]:
+        """Get neighbors from every backend, e.g. to check they agree"""
         return {name: backend.get_neighbors(vertex_id)
                 for name, backend in self.backends.items()}
     
-    def spatial_query(self, geom: geom.base.BaseGeometry) -> List[Tuple[str, Dict]]:
-        """Perform spatial query using DuckDB backend"""
-        return self.backends['duckdb'].spatial_query(geom)
+    def neighbors_many(self, vertex_ids: Iterable[str]) -> Dict[str, Set[str]]:
+        """Neighbors of many vertices from the adjacency index"""
+        return self.index.neighbors_many(vertex_ids)
+    
+    def k_hop(self, vertex_ids: Iterable[str], k: int,
+              backend: Optional[str] = None) -> Set[str]:
+        """Vertices within k hops of the given vertices, excluding them"""
+        return self.query.execute('k_hop', (list(vertex_ids), k), backend=backend)
+    
+    def find_vertices(self, backend: Optional[str] = None, **predicates) -> Set[str]:
+        """Ids of the vertices matching attribute predicates such as type='region'
+        or weight__ge=3 (see parse_predicates)"""
+        return self.query.execute('vertices', kwargs=predicates, backend=backend)
+    
+    def find_edges(self, backend: Optional[str] = None, **predicates) -> List[HyperEdge]:
+        """Hyperedges matching attribute predicates (see parse_predicates)
+        
+        Edges carry the HyperEdge ids they were added with, whichever
+        backend answers.
+        """
+        return self.query.execute('edges', kwargs=predicates, backend=backend)
+    
+    def paths(self, src: str, dst: str, max_hops: int,
+              backend: Optional[str] = None) -> List[List[str]]:
+        """Paths from src to dst of at most max_hops vertex hops"""
+        return self.query.execute('path', (src, dst, max_hops), backend=backend)
+    
+    def spatial_query(self, geom: geom.base.BaseGeometry,
+                      predicate: str = 'intersects') -> List[Tuple[str, Dict]]:
+        """Perform spatial query on the cheapest spatially indexed backend"""
+        return self.query.execute('spatial', (geom, predicate))
+    
+    def spatial_query_many(self, geoms: List[geom.base.BaseGeometry],
+                           predicate: str = 'intersects') -> List[List[Tuple[str, Dict]]]:
+        """Perform one spatial query per geometry in a single index probe"""
+        return self.backends['duckdb'].spatial_query_many(geoms, predicate)
+    
+    def nearest(self, geom: geom.base.BaseGeometry, k: int = 1
+                ) -> List[Tuple[str, Dict, float]]:
+        """Find the k entities nearest to a geometry using DuckDB backend"""
+        return self.backends['duckdb'].nearest(geom, k)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Append-only mutation log for HyperGraph writes.
+
+Each record is framed as a little-endian (length, crc32) header followed by
+a msgpack payload [seq, method, args, kwargs]. Appends are fsynced in
+batches; a torn or corrupt tail left by a crash is truncated on open.
+Per-backend high-water marks live in a JSON sidecar so each backend can
+catch up by replaying only the records it has not applied.
+"""
+import json
+import os
+import struct
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+import msgpack
+import shapely
+
+HEADER = struct.Struct('<II')
+
+# msgpack extension type codes
+EXT_GEOMETRY = 1
+EXT_SET = 2
+EXT_HYPEREDGE = 3
+
+def _default(obj: Any) -> Any:
+    from .hypergraph import HyperEdge
+    if isinstance(obj, HyperEdge):
+        payload = [sorted(obj.vertices, key=str), obj.attributes, obj.geometry, obj.id]
+        return msgpack.ExtType(EXT_HYPEREDGE, _pack(payload))
+    if isinstance(obj, shapely.Geometry):
+        return msgpack.ExtType(EXT_GEOMETRY, shapely.to_wkb(obj))
+    if isinstance(obj, (set, frozenset)):
+        return msgpack.ExtType(EXT_SET, _pack(list(obj)))
+    raise TypeError(f"Cannot log value of type {type(obj).__name__}")
+
+def _ext_hook(code: int, data: bytes) -> Any:
+    if code == EXT_HYPEREDGE:
+        from .hypergraph import HyperEdge
+        vertices, attributes, geometry, edge_id = _unpack(data)
+        return HyperEdge(set(vertices), attributes, geometry, id=edge_id)
+    if code == EXT_GEOMETRY:
+        return shapely.from_wkb(data)
+    if code == EXT_SET:
+        return set(_unpack(data))
+    return msgpack.ExtType(code, data)
+
+def _pack(obj: Any) -> bytes:
+    return msgpack.packb(obj, default=_default, use_bin_type=True)
+
+def _unpack(data: bytes) -> Any:
+    # Tuples inside args (e.g. (vertex_id, attrs) pairs) come back as lists
+    return msgpack.unpackb(data, ext_hook=_ext_hook, raw=False, strict_map_key=False)
+
+class MutationLog:
+    """Durable, replayable sequence of HyperGraph mutations
+
+    Sequence numbers start at 1. append() returns the record's sequence
+    number; records are fsynced every sync_every appends and on sync().
+    """
+
+    def __init__(self, path: str, sync_every: int = 64):
+        self.path = Path(path)
+        self.marks_path = self.path.with_name(self.path.name + '.marks')
+        self.sync_every = sync_every
+        self.last_seq = self._recover_tail()
+        self._unsynced = 0
+        self.file = open(self.path, 'ab')
+
+    def _recover_tail(self) -> int:
+        """Scan the log, truncating any torn or corrupt trailing record"""
+        if not self.path.exists():
+            return 0
+        last_seq, good = 0, 0
+        with open(self.path, 'rb') as f:
+            for seq, _, _, _, end in self._records(f):
+                last_seq, good = seq, end
+        if good != self.path.stat().st_size:
+            with open(self.path, 'r+b') as f:
+                f.truncate(good)
+        return last_seq
+
+    @staticmethod
+    def _records(f) -> Iterator[Tuple[int, str, List[Any], Dict[str, Any], int]]:
+        offset = 0
+        while True:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return
+            length, crc = HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                return
+            offset += HEADER.size + length
+            seq, method, args, kwargs = _unpack(payload)
+            yield seq, method, args, kwargs, offset
+
+    def append(self, method: str, *args, **kwargs) -> int:
+        """Append one mutation and return its sequence number"""
+        seq = self.last_seq + 1
+        payload = _pack([seq, method, list(args), kwargs])
+        self.file.write(HEADER.pack(len(payload), zlib.crc32(payload)))
+        self.file.write(payload)
+        self.last_seq = seq
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every:
+            self.sync()
+        return seq
+
+    def sync(self):
+        """Flush appended records to stable storage"""
+        self.file.flush()
+        if self._unsynced:
+            os.fsync(self.file.fileno())
+            self._unsynced = 0
+
+    def replay(self, after: int = 0) -> Iterator[Tuple[int, str, List[Any], Dict[str, Any]]]:
+        """Yield (seq, method, args, kwargs) for every record with seq > after"""
+        self.file.flush()
+        with open(self.path, 'rb') as f:
+            for seq, method, args, kwargs, _ in self._records(f):
+                if seq > after:
+                    yield seq, method, args, kwargs
+
+    def load_marks(self) -> Dict[str, int]:
+        """Per-backend high-water marks saved by save_marks"""
+        if not self.marks_path.exists():
+            return {}
+        return json.loads(self.marks_path.read_text())
+
+    def save_marks(self, marks: Dict[str, int]):
+        """Atomically persist per-backend high-water marks"""
+        tmp = self.marks_path.with_name(self.marks_path.name + '.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(marks, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.marks_path)
+
+    def close(self):
+        self.sync()
+        self.file.close()
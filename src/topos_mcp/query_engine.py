@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Cost-based query routing for HyperGraph.
+
+Each query kind maps to a backend method; any backend (or the adjacency
+index) exposing that method can answer it. The engine orders the capable
+backends by observed latency, falling back to a static prior until a
+backend has been measured, caches that plan per query kind and sends each
+request to the cheapest backend that is fresh enough to answer. Plans are
+invalidated when measurements change the ordering, and every
+explore_every-th request of a kind is sent to the least recently measured
+candidate so that estimates for the other backends stay current.
+"""
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# Query kind -> backend method answering it
+QUERY_METHODS = {
+    'neighbors': 'get_neighbors',
+    'k_hop': 'k_hop',
+    'vertices': 'find_vertices',
+    'edges': 'find_edges',
+    'spatial': 'spatial_query',
+    'path': 'paths',
+}
+
+# Kinds the adjacency index answers; it keeps no attributes or geometries
+INDEX_KINDS = ('neighbors', 'k_hop')
+
+# Prior latency estimates in seconds for backends not yet measured
+PRIOR_INDEX = 1e-5
+PRIOR_IN_MEMORY = 1e-4
+PRIOR_PERSISTENT = 1e-3
+
+class QueryEngine:
+    """Routes HyperGraph queries to the cheapest capable backend
+
+    Latencies are tracked per (kind, backend) as an exponentially weighted
+    moving average with weight alpha. With a primary backend, replicas that
+    still have queued writes are skipped so reads never see stale data.
+    """
+
+    def __init__(self, graph, alpha: float = 0.2, explore_every: int = 100):
+        self.graph = graph
+        self.alpha = alpha
+        self.explore_every = explore_every
+        self.latency: Dict[Tuple[str, str], float] = {}
+        self.observed_at: Dict[Tuple[str, str], int] = {}
+        self.plans: Dict[str, List[str]] = {}
+        self.calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _targets(self) -> Dict[str, Any]:
+        return {'index': self.graph.index, **self.graph.backends}
+
+    def candidates(self, kind: str) -> List[str]:
+        """Names of the backends able to answer a query kind"""
+        if kind not in QUERY_METHODS:
+            raise ValueError(f"Unknown query kind {kind!r}, expected one of {tuple(QUERY_METHODS)}")
+        method = QUERY_METHODS[kind]
+        return [name for name, target in self._targets().items()
+                if hasattr(target, method) and (name != 'index' or kind in INDEX_KINDS)]
+
+    def estimate(self, kind: str, name: str) -> float:
+        """Expected latency of a query kind on a backend, in seconds"""
+        observed = self.latency.get((kind, name))
+        if observed is not None:
+            return observed
+        if name == 'index':
+            return PRIOR_INDEX
+        return PRIOR_PERSISTENT if self._targets()[name].persistent else PRIOR_IN_MEMORY
+
+    def plan(self, kind: str) -> List[str]:
+        """Capable backends for a query kind, cheapest first (cached)"""
+        plan = self.plans.get(kind)
+        if plan is None:
+            plan = sorted(self.candidates(kind), key=lambda name: self.estimate(kind, name))
+            if not plan:
+                raise ValueError(f"No active backend can answer {kind!r} queries")
+            self.plans[kind] = plan
+        return plan
+
+    def invalidate(self):
+        """Drop cached plans, e.g. after backends are added or replaced"""
+        self.plans.clear()
+
+    def _fresh(self, name: str) -> bool:
+        replica = self.graph.replicas.get(name)
+        return replica is None or replica.queue.unfinished_tasks == 0
+
+    def _route(self, kind: str, backend: Optional[str]) -> List[str]:
+        if backend is not None:
+            return [backend]
+        plan = [name for name in self.plan(kind) if self._fresh(name)]
+        with self._lock:
+            self.calls[kind] = calls = self.calls.get(kind, 0) + 1
+        if self.explore_every and calls % self.explore_every == 0 and len(plan) > 1:
+            stalest = min(plan[1:], key=lambda name: self.observed_at.get((kind, name), -1))
+            plan.remove(stalest)
+            plan.insert(0, stalest)
+        return plan
+
+    def _observe(self, kind: str, name: str, seconds: float):
+        key = (kind, name)
+        with self._lock:
+            previous = self.latency.get(key)
+            self.latency[key] = (seconds if previous is None
+                                 else previous + self.alpha * (seconds - previous))
+            self.observed_at[key] = self.calls.get(kind, 0)
+            plan = self.plans.get(kind)
+            # Replan when this measurement changes the ordering
+            if plan and [self.estimate(kind, n) for n in plan] != sorted(
+                    self.estimate(kind, n) for n in plan):
+                del self.plans[kind]
+
+    def execute(self, kind: str, args: Tuple = (), kwargs: Optional[Dict[str, Any]] = None,
+                backend: Optional[str] = None) -> Any:
+        """Answer a query on the cheapest fresh backend, falling back on errors
+
+        Pass backend to force a particular backend; its errors propagate.
+        """
+        method = QUERY_METHODS[kind]
+        targets = self._targets()
+        error: Optional[Exception] = None
+        for name in self._route(kind, backend):
+            start = time.perf_counter()
+            try:
+                result = getattr(targets[name], method)(*args, **(kwargs or {}))
+            except Exception as e:
+                if backend is not None:
+                    raise
+                error = error or e
+                continue
+            self._observe(kind, name, time.perf_counter() - start)
+            return result
+        raise RuntimeError(f"No backend answered the {kind!r} query") from error
+
+    def explain(self, kind: str) -> List[Tuple[str, float]]:
+        """The cached plan for a query kind with each backend's estimated latency"""
+        return [(name, self.estimate(kind, name)) for name in self.plan(kind)]
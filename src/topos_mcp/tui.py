@@ -18,6 +18,13 @@ from .world_model import WorldModel, handle_click, handle_time_tick
 from .hypergraph import HyperGraph
 from shapely.geometry import Point, Polygon
 
+# Tile background per entity type
+TILE_COLORS = {
+    'region': "#4a9eff",
+    'tile': "#2a2a2a",
+    'default': "#3a3a3a"
+}
+
 class WorldTile(Static):
     """Interactive tile widget for world visualization"""
     selected = reactive(False)
@@ -36,10 +43,13 @@ class WorldTile(Static):
         self.world = world
         self.x = kwargs.get("x", 0)
         self.y = kwargs.get("y", 0)
+        self.entity_id = kwargs.get("entity_id")
     
     def on_mount(self):
         """Initialize tile state"""
-        point = Point(self.x, self.y)
+        if self.entity_id:
+            return
+        point = Point(self.x + 0.5, self.y + 0.5)
         entities = self.world.spatial_query(point)
         if entities:
             self.entity_id = entities[0][0]
@@ -61,17 +71,8 @@ class WorldTile(Static):
         """Get tile color based on entity type"""
         if not self.entity_id:
             return "#1a1a1a"
-        entity = self.world.graph.backends['duckdb'].get_vertex(self.entity_id)
-        if not entity:
-            return "#1a1a1a"
-        
-        entity_type = entity.get('type', 'default')
-        colors = {
-            'region': "#4a9eff",
-            'tile': "#2a2a2a",
-            'default': "#3a3a3a"
-        }
-        return colors.get(entity_type, "#3a3a3a")
+        entity_type = self.app.entity_types.get(self.entity_id, 'default')
+        return TILE_COLORS.get(entity_type, "#3a3a3a")
 
 class InfoPanel(Static):
     """Panel showing information about selected entities"""
@@ -91,13 +92,12 @@ class InfoPanel(Static):
             return Panel("No tile selected")
         
         entity_id = self.selected_tile.entity_id
-        neighbors = self.selected_tile.world.get_neighbors(entity_id)
+        neighbors = self.selected_tile.world.graph.neighbors_many([entity_id])
         
         content = [
             f"Entity: {entity_id}",
             "Neighbors:",
-            *[f"- {n}" for backend_neighbors in neighbors.values() 
-              for n in backend_neighbors],
+            *[f"- {n}" for n in sorted(neighbors[entity_id])],
             "",
             "Properties:",
             *[f"{k}: {v}" for k, v in 
@@ -165,6 +165,16 @@ class ToposTUI(App):
         self.world = WorldModel()
         self.selected_tiles: Set[WorldTile] = set()
         self.time_running = False
+        # Entity id -> type, for the types that have a tile color
+        self.entity_types: Dict[str, str] = {}
+    
+    def index_entity_types(self):
+        """Look up colored entity types with one attribute index query per type"""
+        self.entity_types = {
+            vertex_id: entity_type
+            for entity_type in TILE_COLORS
+            for vertex_id in self.world.graph.find_vertices(type=entity_type)
+        }
     
     def compose(self):
         """Compose the interface"""
@@ -176,13 +186,20 @@ class ToposTUI(App):
         for x in range(10):
             for y in range(10):
                 self.world.create_tile(x, y, type="tile")
+        self.index_entity_types()
+        
+        # Resolve every tile's entity in one spatial index probe
+        coords = [(x, y) for x in range(10) for y in range(10)]
+        entities = self.world.graph.spatial_query_many(
+            [Point(x + 0.5, y + 0.5) for x, y in coords]
+        )
         
         # Create grid of tiles
         grid = Grid()
         tiles = [
-            WorldTile(self.world, x=x, y=y, id=f"tile-{x}-{y}")
-            for x in range(10)
-            for y in range(10)
+            WorldTile(self.world, x=x, y=y, id=f"tile-{x}-{y}",
+                      entity_id=hits[0][0] if hits else None)
+            for (x, y), hits in zip(coords, entities)
         ]
         
         info_panel = InfoPanel()
@@ -240,6 +257,7 @@ class ToposTUI(App):
     
     def action_refresh(self):
         """Refresh all tiles"""
+        self.index_entity_types()
         for x in range(10):
             for y in range(10):
                 tile = self.query_one(f"#tile-{x}-{y}")
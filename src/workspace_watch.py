@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Live workspace indexer.
+
+Watches the workspace directories with watchdog (inotify on Linux) and
+applies filesystem events to the workspace_paths table, so queries and the
+random walk TUI see current trees without rescanning the workspaces.
+Bursts of events are debounced and applied in one transaction; only the
+changed paths are re-read, and a snapshot is stored from the table every
+snapshot_every seconds so diff and changes keep working.
+
+    python db_ops.py watch [--debounce 0.5] [--snapshot-every 300]
+"""
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import pyarrow as pa
+from watchdog.events import FileSystemEvent, FileSystemEventHandler
+from watchdog.observers import Observer
+
+from db_ops import PATH_COLUMNS, TREE_DEPTH, WORKSPACES, ToposDB, paths_tree, tree_path_rows
+
+class _EventCollector(FileSystemEventHandler):
+    """Forwards watchdog events to the watcher's pending set"""
+
+    def __init__(self, watcher: "WorkspaceWatcher"):
+        self.watcher = watcher
+
+    def on_any_event(self, event: FileSystemEvent):
+        if event.event_type == 'moved':
+            self.watcher.mark(event.src_path, deep=True)
+            self.watcher.mark(event.dest_path, deep=True)
+        elif event.event_type in ('created', 'deleted'):
+            self.watcher.mark(event.src_path, deep=True)
+        elif event.event_type == 'modified':
+            self.watcher.mark(event.src_path, deep=False)
+
+class WorkspaceWatcher:
+    """Keeps workspace_paths in step with the workspace directories
+
+    Events are collected by watchdog's thread and applied by run() once no
+    new event has arrived for debounce seconds, or max_delay seconds after
+    the first pending one. Created, deleted and moved paths are rescanned
+    with their subtrees; modified ones are only restated. Workspaces that
+    do not exist when the watcher starts are not watched.
+    """
+
+    def __init__(self, db: ToposDB, debounce: float = 0.5, max_delay: float = 5.0,
+                 snapshot_every: float = 300.0):
+        self.db = db
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.snapshot_every = snapshot_every
+        home = Path.home()
+        self.roots = {str(home / name): name for name in WORKSPACES}
+        # path -> whether its subtree must be rescanned
+        self.pending: Dict[str, bool] = {}
+        self._first_event = self._last_event = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.applied = 0
+
+    def _locate(self, path: str) -> Optional[Tuple[str, str, int]]:
+        """(workspace, root, depth) of an indexed path, or None for paths
+        outside the workspaces, hidden or below the snapshot depth"""
+        for root, workspace in self.roots.items():
+            if path == root:
+                return workspace, root, 0
+            if path.startswith(root + os.sep):
+                parts = path[len(root) + 1:].split(os.sep)
+                if any(part.startswith('.') for part in parts) or len(parts) > TREE_DEPTH:
+                    return None
+                return workspace, root, len(parts)
+        return None
+
+    def mark(self, path: str, deep: bool):
+        """Queue a path for re-reading; its parent directory's mtime changes too"""
+        if isinstance(path, bytes):
+            path = os.fsdecode(path)
+        path = os.path.normpath(path)
+        if self._locate(path) is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if not self.pending:
+                self._first_event = now
+            self._last_event = now
+            self.pending[path] = self.pending.get(path, False) or deep
+            parent = os.path.dirname(path)
+            if path not in self.roots and parent not in self.pending:
+                self.pending[parent] = False
+
+    def seed(self):
+        """Index the workspaces from one full scan and store it as a snapshot"""
+        snapshot = self.db.snapshot_workspaces()
+        rows = []
+        for root, workspace in self.roots.items():
+            tree_path_rows(snapshot["trees"][workspace], workspace, rows=rows)
+        con = self.db.duck_conn
+        con.begin()
+        try:
+            con.execute("DELETE FROM workspace_paths")
+            self._upsert(rows)
+            self.db.store_snapshot(snapshot)
+        except BaseException:
+            con.rollback()
+            raise
+        con.commit()
+
+    def _upsert(self, rows: List[tuple]):
+        if not rows:
+            return
+        con = self.db.duck_conn
+        con.register('_paths', pa.table({
+            column: [row[i] for row in rows] for i, column in enumerate(PATH_COLUMNS)
+        }, schema=pa.schema([("path", pa.string()), ("workspace", pa.string()),
+                             ("parent", pa.string()), ("name", pa.string()),
+                             ("depth", pa.int32()), ("is_dir", pa.bool_()),
+                             ("modified", pa.string()), ("error", pa.string())])))
+        try:
+            con.execute(f"""
+                INSERT OR REPLACE INTO workspace_paths
+                SELECT {', '.join(PATH_COLUMNS)}, now() FROM _paths
+            """)
+        finally:
+            con.unregister('_paths')
+
+    def _delete(self, path: str, subtree_only: bool = False):
+        self.db.duck_conn.execute("""
+            DELETE FROM workspace_paths
+            WHERE (path = $1 AND NOT $2) OR starts_with(path, $1 || $3)
+        """, [path, subtree_only, os.sep])
+
+    @staticmethod
+    def _stat_node(path: str, depth: int) -> Dict[str, Any]:
+        """A path's own snapshot node, without reading a directory's entries"""
+        if depth >= TREE_DEPTH:
+            return {"truncated": True, "path": path}
+        try:
+            modified = datetime.fromtimestamp(os.stat(path).st_mtime).isoformat()
+        except FileNotFoundError:
+            return {"exists": False, "path": path}
+        except OSError as e:
+            return {"exists": True, "path": path, "error": str(e)}
+        return {"exists": True, "path": path, "is_dir": os.path.isdir(path),
+                "name": os.path.basename(path), "modified": modified}
+
+    def apply(self, batch: Dict[str, bool]):
+        """Re-read a batch of pending paths in one transaction"""
+        # A rescanned directory covers everything queued beneath it
+        deep = {path for path, rescan in batch.items() if rescan}
+        paths = [path for path in sorted(batch)
+                 if not any(str(parent) in deep for parent in Path(path).parents)]
+        con = self.db.duck_conn
+        con.begin()
+        try:
+            for path in paths:
+                workspace, _, depth = self._locate(path)
+                if not os.path.lexists(path):
+                    self._delete(path)
+                    continue
+                if batch[path]:
+                    self._delete(path, subtree_only=True)
+                    tree = self.db.refresh_tree(path, TREE_DEPTH - depth)
+                else:
+                    tree = self._stat_node(path, depth)
+                self._upsert(tree_path_rows(tree, workspace, depth))
+        except BaseException:
+            con.rollback()
+            raise
+        con.commit()
+        self.applied += len(paths)
+
+    def snapshot(self) -> str:
+        """Store the indexed trees as a workspace snapshot; returns its root hash"""
+        timestamp = datetime.now().isoformat()
+        trees = {workspace: paths_tree(self.db.duck_conn, workspace) or
+                 {"exists": False, "path": root}
+                 for root, workspace in self.roots.items()}
+        return self.db.store_snapshot({"timestamp": timestamp, "trees": trees})
+
+    def _take_ready(self) -> Dict[str, bool]:
+        now = time.monotonic()
+        with self._lock:
+            if not self.pending or (now - self._last_event < self.debounce
+                                    and now - self._first_event < self.max_delay):
+                return {}
+            batch, self.pending = self.pending, {}
+            return batch
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self, poll: float = 0.05):
+        """Seed the index, then apply events until stop() or Ctrl-C"""
+        self.seed()
+        observer = Observer()
+        handler = _EventCollector(self)
+        for root in self.roots:
+            if os.path.isdir(root):
+                observer.schedule(handler, root, recursive=True)
+        observer.start()
+        last_snapshot, changed = time.monotonic(), False
+        try:
+            while not self._stop.wait(poll):
+                batch = self._take_ready()
+                if batch:
+                    self.apply(batch)
+                    changed = True
+                if changed and time.monotonic() - last_snapshot >= self.snapshot_every:
+                    self.snapshot()
+                    last_snapshot, changed = time.monotonic(), False
+        except KeyboardInterrupt:
+            pass
+        finally:
+            observer.stop()
+            observer.join()
+            # Apply whatever is still pending and record the final state
+            with self._lock:
+                batch, self.pending = self.pending, {}
+            if batch:
+                self.apply(batch)
+                changed = True
+            if changed:
+                self.snapshot()
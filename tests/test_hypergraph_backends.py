@@ -0,0 +1,25 @@
+"""Every default HyperGraph backend answers the same queries"""
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC))
+
+from topos_mcp.hypergraph import BACKEND_NAMES, HyperGraph
+
+def test_default_graph(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    graph = HyperGraph()
+    assert set(graph.backends) == set(BACKEND_NAMES)
+    for vertex_id in 'abcde':
+        graph.add_vertex(vertex_id)
+    graph.add_edge({'a', 'b'})
+    graph.bulk_load([('f', {})], [({'b', 'c', 'd'}, {}), ({'e', 'f'}, {})])
+
+    for name, backend in graph.backends.items():
+        assert backend.get_neighbors('b') == {'a', 'c', 'd'}, name
+        assert backend.get_neighbors('e') == {'f'}, name
+    kuzu = graph.backends['kuzu']
+    assert kuzu.k_hop(['a'], 2) == {'b', 'c', 'd'}
+    assert [path[::2] for path in kuzu.paths('a', 'c', 2)] == [['a', 'b', 'c']]
+    graph.close()
@@ -0,0 +1,102 @@
+"""Crash recovery of HyperGraph from its mutation log"""
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC))
+
+from topos_mcp.hypergraph import DuckDBBackend, HyperGraph, IncidenceBackend
+
+EDGES = [{'a', 'b'}, {'b', 'c'}, {'c', 'd'}, {'a', 'b', 'c'}, {'a', 'd'}]
+
+# Writes a graph, makes the log durable and dies before any marks are saved
+CRASH = """
+import os, sys
+sys.path.insert(0, {src!r})
+from topos_mcp.hypergraph import DuckDBBackend, HyperGraph, IncidenceBackend
+graph = HyperGraph({{'incidence': IncidenceBackend(), 'duckdb': DuckDBBackend({db!r})}},
+                   log_path={log!r})
+vertices = [(v, {{'weight': i}}) for i, v in enumerate('abcd')]
+edges = [(members, {{'seq': i}}) for i, members in enumerate({edges!r})]
+if {bulk!r}:
+    graph.bulk_load(vertices, edges)
+else:
+    for vertex_id, attrs in vertices:
+        graph.add_vertex(vertex_id, **attrs)
+    for members, attrs in edges:
+        graph.add_edge(members, **attrs)
+graph.log.sync()
+os._exit(1)
+"""
+
+def open_graph(tmp_path: Path) -> HyperGraph:
+    return HyperGraph({'incidence': IncidenceBackend(),
+                       'duckdb': DuckDBBackend(str(tmp_path / "graph.duckdb"))},
+                      log_path=str(tmp_path / "graph.log"))
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_recover_after_crash_is_idempotent(tmp_path, bulk):
+    crash = CRASH.format(src=str(SRC), db=str(tmp_path / "graph.duckdb"),
+                         log=str(tmp_path / "graph.log"), edges=EDGES, bulk=bulk)
+    assert subprocess.run([sys.executable, "-c", crash]).returncode == 1
+
+    for _ in range(2):
+        graph = open_graph(tmp_path)
+        graph.recover()
+        assert graph.recovery_errors == []
+        duckdb = graph.backends['duckdb']
+        assert duckdb.con.execute("SELECT count(*) FROM edges").fetchone()[0] == len(EDGES)
+        assert duckdb.con.execute("SELECT count(*) FROM vertices").fetchone()[0] == 4
+        for vertex_id in 'abcd':
+            assert duckdb.get_neighbors(vertex_id) == graph.backends['incidence'].get_neighbors(vertex_id)
+        assert duckdb.get_vertex('c') == {'weight': 2}
+        graph.close()
+
+# Writes 10 records and closes, then reopens and dies between log syncs
+REOPEN_CRASH = """
+import os, sys
+sys.path.insert(0, {src!r})
+from topos_mcp.hypergraph import DuckDBBackend, HyperGraph, IncidenceBackend
+def open_graph():
+    return HyperGraph({{'incidence': IncidenceBackend(), 'duckdb': DuckDBBackend({db!r})}},
+                      log_path={log!r})
+graph = open_graph()
+for i in range(10):
+    graph.add_vertex(f'v{{i}}')
+graph.close()
+graph.backends['duckdb'].con.close()
+graph = open_graph()
+for i in range(10, 64):
+    graph.add_vertex(f'v{{i}}')
+os._exit(1)
+"""
+
+def test_marks_never_pass_the_synced_log(tmp_path):
+    crash = REOPEN_CRASH.format(src=str(SRC), db=str(tmp_path / "graph.duckdb"),
+                                log=str(tmp_path / "graph.log"))
+    assert subprocess.run([sys.executable, "-c", crash]).returncode == 1
+
+    graph = open_graph(tmp_path)
+    assert graph.marks['duckdb'] <= graph.log.last_seq
+    graph.recover()
+    assert graph.recovery_errors == []
+    # Records covered by a saved mark were synced, so replay rebuilds them
+    stored = graph.backends['duckdb'].con.execute("SELECT count(*) FROM vertices").fetchone()[0]
+    assert len(graph.backends['incidence'].vertex_ids) == stored
+    assert stored == 64
+    graph.add_vertex('after')
+    graph.close()
+    assert graph.marks['duckdb'] == graph.log.last_seq == 65
+
+def test_marks_are_clamped_to_the_log(tmp_path):
+    graph = open_graph(tmp_path)
+    graph.add_vertex('a')
+    graph.close()
+    graph.log.save_marks({'duckdb': 1000})
+
+    graph = open_graph(tmp_path)
+    assert graph.marks['duckdb'] == graph.log.last_seq == 1
+    graph.close()